@@ -0,0 +1,310 @@
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import main
+
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark")
+FIXTURES_DIR = os.path.join(BENCHMARK_DIR, "fixtures")
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+GOLDEN_DIR = os.path.join(BENCHMARK_DIR, "golden")
+
+COLLECTION = "bench"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves the recorded storefront pages the way the live shop routes them.
+
+    "{{origin}}" in a fixture is replaced by the server's own origin so that
+    absolute URLs in the product JSON point back at the stand-in server.
+    Product requests can be slowed by server.latency seconds, and every
+    server.error_every-th one answered with 429 or 503 instead.
+    """
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if "/products/" in parts.path and self.inject_fault():
+            return
+        query = parse_qs(parts.query)
+        page = query.get("page", ["1"])[0]
+        path = parts.path.rstrip("/")
+        collection = f"/collections/{COLLECTION}"
+
+        if path == collection:
+            self.send_fixture(f"collections/{COLLECTION}/page-{page}.html", "text/html",
+                              fallback=f"collections/{COLLECTION}/page-empty.html")
+        elif path == f"{collection}/products.json":
+            self.send_fixture(f"collections/{COLLECTION}/products-{page}.json", "application/json",
+                              empty='{"products": []}')
+        elif path.startswith("/cdn/"):
+            # A small deterministic body per image path
+            self.send_body(hashlib.sha256(path.encode("utf-8")).digest() * 64, "image/jpeg")
+        elif "/products/" in path:
+            handle = path.split("/products/")[-1]
+            if handle.endswith(".js"):
+                self.send_fixture(f"products/{handle}", "application/json")
+            else:
+                self.send_fixture(f"products/{handle}.html", "text/html")
+        else:
+            self.send_error(404)
+
+    def inject_fault(self):
+        """Delay the request and return True if it was answered with an error instead."""
+        time.sleep(self.server.latency)
+        if not self.server.error_every:
+            return False
+        with self.server.lock:
+            self.server.product_requests += 1
+            count = self.server.product_requests
+        if count % self.server.error_every:
+            return False
+        status = 429 if count // self.server.error_every % 2 else 503
+        self.send_response(status)
+        self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return True
+
+    def send_fixture(self, name, content_type, fallback=None, empty=None):
+        path = os.path.join(FIXTURES_DIR, name)
+        if not os.path.exists(path) and fallback is not None:
+            path = os.path.join(FIXTURES_DIR, fallback)
+        if not os.path.exists(path):
+            if empty is None:
+                self.send_error(404)
+            else:
+                self.send_body(empty.encode("utf-8"), content_type)
+            return
+        with open(path, encoding="utf-8") as f:
+            body = f.read().replace("{{origin}}", self.server.origin)
+        self.send_body(body.encode("utf-8"), content_type)
+
+    def send_body(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(handler=FixtureHandler, latency=0.0, error_every=0):
+    """Start the stand-in storefront on a free local port in a background thread."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.origin = f"http://127.0.0.1:{server.server_address[1]}"
+    server.latency = latency
+    server.error_every = error_every
+    server.product_requests = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def normalize_rows(rows, origin):
+    """Replace the server's origin so rows can be compared across runs."""
+    return json.loads(json.dumps(rows).replace(origin, "{{origin}}"))
+
+
+def run_benchmark(mode, extraction, workers, latency=0.0, error_every=0, images=False, pipelined=False):
+    """Scrape the fixture collection and return (report, rows)."""
+    server = start_server(latency=latency, error_every=error_every)
+    workdir = tempfile.mkdtemp(prefix="scraper-benchmark-")
+    cwd = os.getcwd()
+
+    tracemalloc.start()
+    start_time = time.time()
+    try:
+        os.chdir(workdir)
+        main.scrape_data(
+            [f"{server.origin}/collections/{COLLECTION}"], 1, 3, workers=workers, extraction=extraction,
+            fast_path=mode == "http", fast_discovery=mode == "http", pacing="fast", incremental=False,
+            lean_browser=True, page_load_strategy="eager", adaptive=True, images=images,
+            pipelined=pipelined,
+        )
+        elapsed = time.time() - start_time
+        peak_traced = tracemalloc.get_traced_memory()[1]
+
+        checkpoint = main.Checkpoint(glob.glob(os.path.join(workdir, "output", "checkpoints", "*.sqlite"))[0])
+        rows = normalize_rows(list(main.expand_rows(checkpoint.iter_records())), server.origin)
+        checkpoint.close()
+        with open(os.path.join(workdir, "output", "metrics.json"), encoding="utf-8") as f:
+            summary = json.load(f)["summary"]
+        image_rows = []
+        if images:
+            with open(os.path.join(workdir, "output", "images.csv"), newline="", encoding="utf-8") as f:
+                image_rows = list(csv.DictReader(f))
+    finally:
+        tracemalloc.stop()
+        os.chdir(cwd)
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    products = len({row["Handle"] for row in rows})
+    phases = {entry["name"]: entry for entry in summary if entry["kind"] == "phase"}
+    product_phase = phases.get("product", {})
+    report = {
+        "products": products,
+        "rows": len(rows),
+        "seconds": round(elapsed, 3),
+        "products_per_sec": round(products / elapsed, 3) if elapsed > 0 else 0.0,
+        "time_to_first_product": phases.get("time_to_first_product", {}).get("p50_seconds"),
+        "peak_memory_mb": round(peak_traced / 1024 / 1024, 2),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+        "p50_commands_per_product": product_phase.get("p50_commands", 0),
+        "p95_commands_per_product": product_phase.get("p95_commands", 0),
+        "phases": {
+            name: {"count": entry["count"], "p50_seconds": entry["p50_seconds"], "p95_seconds": entry["p95_seconds"]}
+            for name, entry in phases.items()
+        },
+    }
+    if images:
+        report["image_files"] = len({row[column] for row in image_rows
+                                     for column in ("Image Src File", "Variant Image File") if row[column]})
+        report["missing_images"] = sum(
+            1 for row in image_rows for url, path in (("Image Src", "Image Src File"), ("Variant Image", "Variant Image File"))
+            if row[url] and not row[path]
+        )
+    return report, rows
+
+
+def check_baseline(key, report, baseline, tolerance):
+    """Return the list of regressions of report against the stored baseline."""
+    expected = baseline.get(key)
+    if expected is None:
+        return []
+    regressions = []
+    if report["products_per_sec"] < expected["products_per_sec"] * (1 - tolerance):
+        regressions.append(f"throughput {report['products_per_sec']} products/sec < baseline {expected['products_per_sec']}")
+    if report["peak_memory_mb"] > expected["peak_memory_mb"] * (1 + tolerance):
+        regressions.append(f"peak memory {report['peak_memory_mb']} MB > baseline {expected['peak_memory_mb']} MB")
+    if report["p95_commands_per_product"] > expected["p95_commands_per_product"]:
+        regressions.append(
+            f"p95 WebDriver commands per product {report['p95_commands_per_product']} > "
+            f"baseline {expected['p95_commands_per_product']}"
+        )
+    return regressions
+
+
+def check_golden(rows, golden):
+    """Return a description of the first difference between rows and the golden output."""
+    if len(rows) != len(golden):
+        return [f"{len(rows)} rows, golden output has {len(golden)}"]
+    for index, (row, expected) in enumerate(zip(rows, golden)):
+        for column in expected:
+            if row.get(column) != expected[column]:
+                return [f"row {index} ({expected.get('Handle')}) column '{column}': {row.get(column)!r} != {expected[column]!r}"]
+        extra = set(row) - set(expected)
+        if extra:
+            return [f"row {index} has unexpected columns: {sorted(extra)}"]
+    return []
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scraper against recorded storefront fixtures.")
+    parser.add_argument("--mode", choices=["http", "browser"], default="http",
+                        help="http uses the requests fast path, browser drives Edge")
+    parser.add_argument("--extraction", choices=["webdriver", "snapshot", "dom"], default="dom")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed relative drop in throughput / growth in memory before failing")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds the stand-in server waits before answering a product request")
+    parser.add_argument("--error-every", type=int, default=0,
+                        help="answer every Nth product request with 429 or 503; rows must still match the golden output")
+    parser.add_argument("--images", action="store_true",
+                        help="also run the image download stage and check every row image has a local file")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="scrape products while the listing pages are still being walked")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--update-golden", action="store_true")
+    parser.add_argument("--strict", action="store_true",
+                        help="fail instead of warning when this run has no baseline or golden output")
+    args = parser.parse_args(argv)
+
+    golden_key = f"{args.mode}-{args.extraction}"
+    key = golden_key
+    if args.latency or args.error_every:
+        key += f"-latency{args.latency:g}-errors{args.error_every}"
+    if args.images:
+        key += "-images"
+    if args.pipelined:
+        key += "-pipelined"
+    report, rows = run_benchmark(args.mode, args.extraction, args.workers, args.latency, args.error_every,
+                                 args.images, args.pipelined)
+
+    print(f"\nBenchmark {key}")
+    print(json.dumps(report, indent=2))
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, encoding="utf-8") as f:
+            baseline = json.load(f)
+    golden_file = os.path.join(GOLDEN_DIR, f"{golden_key}.json")
+
+    if args.update_baseline:
+        baseline[key] = {name: report[name] for name in ("products_per_sec", "peak_memory_mb", "p95_commands_per_product")}
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline for {key} updated.")
+    if args.update_golden:
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        with open(golden_file, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+            f.write("\n")
+        print(f"Golden output for {golden_key} updated.")
+
+    failures = check_baseline(key, report, baseline, args.tolerance)
+    if report.get("missing_images"):
+        failures.append(f"{report['missing_images']} row images have no local file")
+    missing = []
+    if key not in baseline:
+        missing.append(f"No baseline for {key}; run with --update-baseline to record one.")
+    if os.path.exists(golden_file):
+        with open(golden_file, encoding="utf-8") as f:
+            failures += check_golden(rows, json.load(f))
+    else:
+        missing.append(f"No golden output for {golden_key}; run with --update-golden to record one.")
+    for message in missing:
+        if args.strict:
+            failures.append(message)
+        else:
+            print(message)
+
+    # The fast path has to produce the rows the browser would, and snapshot
+    # extraction the rows webdriver extraction does, so hold them to those goldens too
+    if args.mode == "http":
+        reference_key = f"browser-{args.extraction}"
+    elif args.extraction == "snapshot":
+        reference_key = "browser-webdriver"
+    else:
+        reference_key = None
+    reference_file = os.path.join(GOLDEN_DIR, f"{reference_key}.json")
+    if reference_key is not None and os.path.exists(reference_file):
+        with open(reference_file, encoding="utf-8") as f:
+            failures += [f"{reference_key} golden: {failure}" for failure in check_golden(rows, json.load(f))]
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
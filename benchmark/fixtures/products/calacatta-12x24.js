@@ -0,0 +1,81 @@
+{
+  "id": 129200,
+  "title": "Calacatta 12x24 Porcelain Tile",
+  "handle": "calacatta-12x24",
+  "vendor": "Ottimo",
+  "type": "Porcelain Tile",
+  "tags": [
+    "Floor",
+    "Wall"
+  ],
+  "images": [
+    "{{origin}}/cdn/calacatta-12x24-room.jpg",
+    "{{origin}}/cdn/calacatta-12x24-detail.jpg",
+    "{{origin}}/cdn/calacatta-12x24-white.jpg",
+    "{{origin}}/cdn/calacatta-12x24-grey.jpg",
+    "{{origin}}/cdn/calacatta-12x24-beige.jpg"
+  ],
+  "variants": [
+    {
+      "id": 129201,
+      "title": "White / 12x24",
+      "options": [
+        "White",
+        "12x24"
+      ],
+      "option1": "White",
+      "option2": "12x24",
+      "sku": "CALACATTA-12X24-WHI",
+      "barcode": "000000129201",
+      "price": 399,
+      "compare_at_price": 499,
+      "available": true,
+      "featured_image": {
+        "id": 9000,
+        "src": "{{origin}}/cdn/calacatta-12x24-white.jpg"
+      }
+    },
+    {
+      "id": 129202,
+      "title": "Grey / 12x24",
+      "options": [
+        "Grey",
+        "12x24"
+      ],
+      "option1": "Grey",
+      "option2": "12x24",
+      "sku": "CALACATTA-12X24-GRE",
+      "barcode": "000000129202",
+      "price": 429,
+      "compare_at_price": null,
+      "available": true,
+      "featured_image": {
+        "id": 9001,
+        "src": "{{origin}}/cdn/calacatta-12x24-grey.jpg"
+      }
+    },
+    {
+      "id": 129203,
+      "title": "Beige / 12x24",
+      "options": [
+        "Beige",
+        "12x24"
+      ],
+      "option1": "Beige",
+      "option2": "12x24",
+      "sku": "CALACATTA-12X24-BEI",
+      "barcode": "000000129203",
+      "price": 449,
+      "compare_at_price": 549,
+      "available": true,
+      "featured_image": {
+        "id": 9002,
+        "src": "{{origin}}/cdn/calacatta-12x24-beige.jpg"
+      }
+    }
+  ],
+  "options": [
+    "Color",
+    "Size"
+  ]
+}
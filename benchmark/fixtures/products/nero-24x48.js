@@ -0,0 +1,41 @@
+{
+  "id": 81100,
+  "title": "Nero 24x48 Porcelain Tile",
+  "handle": "nero-24x48",
+  "vendor": "Ottimo",
+  "type": "Porcelain Tile",
+  "tags": [
+    "Floor",
+    "Wall"
+  ],
+  "images": [
+    "{{origin}}/cdn/nero-24x48-room.jpg",
+    "{{origin}}/cdn/nero-24x48-detail.jpg",
+    "{{origin}}/cdn/nero-24x48-black.jpg"
+  ],
+  "variants": [
+    {
+      "id": 81101,
+      "title": "Black / 24x48",
+      "options": [
+        "Black",
+        "24x48"
+      ],
+      "option1": "Black",
+      "option2": "24x48",
+      "sku": "NERO-24X48-BLA",
+      "barcode": "000000081101",
+      "price": 699,
+      "compare_at_price": null,
+      "available": true,
+      "featured_image": {
+        "id": 9000,
+        "src": "{{origin}}/cdn/nero-24x48-black.jpg"
+      }
+    }
+  ],
+  "options": [
+    "Color",
+    "Size"
+  ]
+}
@@ -0,0 +1,61 @@
+{
+  "id": 85800,
+  "title": "Slate 6x24 Porcelain Tile",
+  "handle": "slate-6x24",
+  "vendor": "Ottimo",
+  "type": "Porcelain Tile",
+  "tags": [
+    "Floor",
+    "Wall"
+  ],
+  "images": [
+    "{{origin}}/cdn/slate-6x24-room.jpg",
+    "{{origin}}/cdn/slate-6x24-detail.jpg",
+    "{{origin}}/cdn/slate-6x24-charcoal.jpg",
+    "{{origin}}/cdn/slate-6x24-rust.jpg"
+  ],
+  "variants": [
+    {
+      "id": 85801,
+      "title": "Charcoal / 6x24",
+      "options": [
+        "Charcoal",
+        "6x24"
+      ],
+      "option1": "Charcoal",
+      "option2": "6x24",
+      "sku": "SLATE-6X24-CHA",
+      "barcode": "000000085801",
+      "price": 259,
+      "compare_at_price": null,
+      "available": true,
+      "featured_image": {
+        "id": 9000,
+        "src": "{{origin}}/cdn/slate-6x24-charcoal.jpg"
+      }
+    },
+    {
+      "id": 85802,
+      "title": "Rust / 6x24",
+      "options": [
+        "Rust",
+        "6x24"
+      ],
+      "option1": "Rust",
+      "option2": "6x24",
+      "sku": "SLATE-6X24-RUS",
+      "barcode": "000000085802",
+      "price": 259,
+      "compare_at_price": null,
+      "available": true,
+      "featured_image": {
+        "id": 9001,
+        "src": "{{origin}}/cdn/slate-6x24-rust.jpg"
+      }
+    }
+  ],
+  "options": [
+    "Color",
+    "Size"
+  ]
+}
@@ -0,0 +1,61 @@
+{
+  "id": 147300,
+  "title": "Travertino 16x16 Porcelain Tile",
+  "handle": "travertino-16x16",
+  "vendor": "Ottimo",
+  "type": "Porcelain Tile",
+  "tags": [
+    "Floor",
+    "Wall"
+  ],
+  "images": [
+    "{{origin}}/cdn/travertino-16x16-room.jpg",
+    "{{origin}}/cdn/travertino-16x16-detail.jpg",
+    "{{origin}}/cdn/travertino-16x16-ivory.jpg",
+    "{{origin}}/cdn/travertino-16x16-walnut.jpg"
+  ],
+  "variants": [
+    {
+      "id": 147301,
+      "title": "Ivory / 16x16",
+      "options": [
+        "Ivory",
+        "16x16"
+      ],
+      "option1": "Ivory",
+      "option2": "16x16",
+      "sku": "TRAVERTINO-16X16-IVO",
+      "barcode": "000000147301",
+      "price": 299,
+      "compare_at_price": 349,
+      "available": true,
+      "featured_image": {
+        "id": 9000,
+        "src": "{{origin}}/cdn/travertino-16x16-ivory.jpg"
+      }
+    },
+    {
+      "id": 147302,
+      "title": "Walnut / 16x16",
+      "options": [
+        "Walnut",
+        "16x16"
+      ],
+      "option1": "Walnut",
+      "option2": "16x16",
+      "sku": "TRAVERTINO-16X16-WAL",
+      "barcode": "000000147302",
+      "price": 319,
+      "compare_at_price": 349,
+      "available": true,
+      "featured_image": {
+        "id": 9001,
+        "src": "{{origin}}/cdn/travertino-16x16-walnut.jpg"
+      }
+    }
+  ],
+  "options": [
+    "Color",
+    "Size"
+  ]
+}
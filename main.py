@@ -3,15 +3,34 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
-import pandas as pd
+from selenium.common.exceptions import TimeoutException
 import time
 import random
 from selenium.webdriver.edge.options import Options
 import os
+import csv
+import argparse
+import multiprocessing
+import json
+import mimetypes
+import sys
+import hashlib
+import itertools
+import copy
+import sqlite3
+import queue
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
 from bs4 import BeautifulSoup
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+import requests
+from requests.adapters import HTTPAdapter
+from openpyxl import Workbook
 
 
-def slow_smooth_scroll(driver, total_scroll_time=15):
+def slow_smooth_scroll(driver, total_scroll_time=15, sleep=time.sleep):
     """Perform slow and smooth scrolling on a page."""
     scroll_height = driver.execute_script("return document.body.scrollHeight")
     viewport_height = driver.execute_script("return window.innerHeight")
@@ -35,14 +54,14 @@ def slow_smooth_scroll(driver, total_scroll_time=15):
         driver.execute_script(f"window.scrollTo(0, {current_position});")
         
         # Pause slightly longer for smooth, slower behavior
-        time.sleep(random.uniform(0.2, 0.5))  # Moderate, varying delays
+        sleep(random.uniform(0.2, 0.5))  # Moderate, varying delays
 
     # Scroll back up slightly at the end for realism
     driver.execute_script(f"window.scrollTo(0, {max(0, current_position - 300)});")
 
 
 
-def simulate_mouse_movement(driver):
+def simulate_mouse_movement(driver, sleep=time.sleep):
     """Simulate mouse movement to mimic human interactions."""
     try:
         actions = ActionChains(driver)
@@ -52,25 +71,461 @@ def simulate_mouse_movement(driver):
             x_offset = random.randint(-10, 10)
             y_offset = random.randint(-10, 10)
             actions.move_by_offset(x_offset, y_offset).perform()
-            time.sleep(random.uniform(0.1, 0.5))
+            sleep(random.uniform(0.1, 0.5))
     except Exception as e:
         print(f"Mouse movement simulation failed: {e}")
 
 
-def close_popup(driver):
+def close_popup(driver, timeout=5):
     """Check for and close the popup button if it exists."""
     try:
-        WebDriverWait(driver, 5).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "button.exit-popup__close"))
-        )
+        if timeout > 0:
+            WebDriverWait(driver, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "button.exit-popup__close"))
+            )
         close_button = driver.find_element(By.CSS_SELECTOR, "button.exit-popup__close")
         ActionChains(driver).move_to_element(close_button).click(close_button).perform()
         print("Popup closed.")
     except Exception:
         pass
 
-def scrape_data(brands, start_page, end_page):      # Configure Edge options
+
+# Humanization and pacing settings per profile. Delays are (min, max) seconds.
+PACING_PROFILES = {
+    # the original behaviour: long random pauses, scrolling and mouse movement
+    "stealth": {
+        "page_delay": (4, 7),
+        "popup_timeout": 5,
+        "scroll_time": 5,
+        "mouse_movement": True,
+        "product_delay": (1, 3),
+        "variant_delay": (0.5, 1.5),
+        "domain_interval": 2.0,
+    },
+    "balanced": {
+        "page_delay": (0.5, 1.5),
+        "popup_timeout": 1,
+        "scroll_time": 1,
+        "mouse_movement": False,
+        "product_delay": (0, 0.5),
+        "variant_delay": (0, 0),
+        "domain_interval": 1.0,
+    },
+    "fast": {
+        "page_delay": (0, 0),
+        "popup_timeout": 0,
+        "scroll_time": 0,
+        "mouse_movement": False,
+        "product_delay": (0, 0),
+        "variant_delay": (0, 0),
+        "domain_interval": 0.0,
+    },
+}
+
+
+class Pacer:
+    """Waits on page readiness and applies the humanization of a pacing profile.
+
+    Every deliberate pause goes through sleep() and every readiness wait
+    through wait_until(), so the time spent in each can be reported per run.
+    Requests to the same host are spaced at least domain_interval seconds
+    apart across all workers; domain_intervals overrides it per host.
+    """
+
+    def __init__(self, profile="balanced", domain_intervals=None):
+        self.profile = profile
+        self.settings = PACING_PROFILES[profile]
+        self.domain_intervals = domain_intervals or {}
+        self.slept = 0.0
+        self.waited = 0.0
+        self._next_request = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def sleep(self, seconds):
+        if seconds <= 0:
+            return
+        time.sleep(seconds)
+        with self._lock:
+            self.slept += seconds
+
+    def pause(self, setting):
+        """Sleep for a random duration from a (min, max) profile setting."""
+        self.sleep(random.uniform(*self.settings[setting]))
+
+    def before_request(self, url):
+        """Block until the minimum interval for the URL's host has passed."""
+        host = urlsplit(url).netloc
+        interval = self.domain_intervals.get(host, self.settings["domain_interval"])
+        with self._lock:
+            now = time.time()
+            start = max(now, self._next_request.get(host, 0.0))
+            self._next_request[host] = start + interval
+        self.sleep(start - now)
+
+    @contextmanager
+    def request(self, url):
+        """Space a request like before_request(), then time it for the calling thread."""
+        self.before_request(url)
+        start = time.time()
+        try:
+            yield
+        finally:
+            self._local.request_seconds = getattr(self._local, "request_seconds", 0.0) + time.time() - start
+
+    def take_request_seconds(self):
+        """Return the time the calling thread spent in request() since the last call."""
+        seconds = getattr(self._local, "request_seconds", 0.0)
+        self._local.request_seconds = 0.0
+        return seconds
+
+    def wait_until(self, driver, condition, timeout=10):
+        """Wait for a readiness condition; return False instead of raising on timeout."""
+        start = time.time()
+        try:
+            WebDriverWait(driver, timeout).until(condition)
+            return True
+        except TimeoutException:
+            return False
+        finally:
+            with self._lock:
+                self.waited += time.time() - start
+
+    def humanize(self, driver, metrics=None, product=""):
+        """Run the profile's human-like interaction on a freshly loaded page."""
+        metrics = metrics or Metrics()
+        with metrics.phase("popup", driver, product):
+            close_popup(driver, timeout=self.settings["popup_timeout"])
+        self.pause("page_delay")
+        if self.settings["scroll_time"] > 0:
+            with metrics.phase("scroll", driver, product):
+                slow_smooth_scroll(driver, total_scroll_time=self.settings["scroll_time"], sleep=self.sleep)
+        if self.settings["mouse_movement"]:
+            with metrics.phase("mouse_movement", driver, product):
+                simulate_mouse_movement(driver, sleep=self.sleep)
+
+    def summary(self):
+        return (
+            f"Deliberate waiting ({self.profile} profile): {self.slept:.1f}s sleeping, "
+            f"{self.waited:.1f}s waiting for pages to be ready"
+        )
+
+
+def _page_ready(driver):
+    return driver.execute_script("return document.readyState") != "loading"
+
+
+def _url_changed(previous_url):
+    return lambda driver: driver.current_url != previous_url
+
+
+THROTTLE_STATUSES = (403, 429, 503)
+CHALLENGE_TITLES = ("just a moment", "attention required", "access denied", "too many requests", "are you a robot")
+
+
+class Throttled(Exception):
+    """Raised when the site answers with a rate-limit status or a challenge page."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def throttled_response(response):
+    """Return a Throttled error for a rate-limit response, or None."""
+    if response is None or response.status_code not in THROTTLE_STATUSES:
+        return None
+    try:
+        retry_after = float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        retry_after = None
+    return Throttled(f"HTTP {response.status_code} from {urlsplit(response.url).netloc}", retry_after)
+
+
+class BrowserStuck(Exception):
+    """Raised when the browser does not finish loading a page within its page load timeout."""
+
+
+def raise_if_challenged(driver):
+    """Raise Throttled if the browser landed on a bot challenge or rate-limit page."""
+    title = driver.title
+    if any(marker in title.lower() for marker in CHALLENGE_TITLES):
+        raise Throttled(f"challenge page: {title}")
+
+
+class AdaptiveRateLimiter:
+    """Per-host token bucket whose rate and concurrency adapt with AIMD.
+
+    acquire() blocks until the host has a free slot and a token; the bucket
+    holds one token per slot, so a host can be hit in bursts of its
+    concurrency but not faster than its rate on average. A request
+    released as ok and faster than target_latency adds `increase` to the
+    host's rate and about one slot per round to its concurrency; a failed,
+    throttled or slow request multiplies both by `decrease`.
+    """
+
+    def __init__(self, rate=2.0, min_rate=0.05, max_rate=10.0, concurrency=1, max_concurrency=4,
+                 target_latency=10.0, increase=0.2, decrease=0.5):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.concurrency = concurrency
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.increase = increase
+        self.decrease = decrease
+        self.waited = 0.0
+        self._hosts = {}
+        self._condition = threading.Condition()
+
+    def _host(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = {
+                "rate": self.rate, "tokens": 1.0, "updated": time.time(), "limit": float(self.concurrency),
+                "in_flight": 0, "latency": None, "ok": 0, "failed": 0, "throttled": 0,
+            }
+        return self._hosts[host]
+
+    def acquire(self, url):
+        """Block until a request to the URL's host may start."""
+        start = time.time()
+        with self._condition:
+            state = self._host(url)
+            while True:
+                now = time.time()
+                state["tokens"] = min(state["limit"], state["tokens"] + (now - state["updated"]) * state["rate"])
+                state["updated"] = now
+                if state["tokens"] >= 1.0 and state["in_flight"] < int(state["limit"]):
+                    state["tokens"] -= 1.0
+                    state["in_flight"] += 1
+                    self.waited += now - start
+                    return
+                # Wait for the next token, or for a slot to be released
+                timeout = (1.0 - state["tokens"]) / state["rate"] if state["tokens"] < 1.0 else None
+                self._condition.wait(timeout)
+
+    def release(self, url, latency, ok=True, throttled=False):
+        """Record the outcome and latency of a request started by acquire() and adapt the host's pace.
+
+        latency is the time spent waiting on the host itself, so pacing sleeps
+        and page interaction do not make a healthy host look slow.
+        """
+        with self._condition:
+            state = self._host(url)
+            state["in_flight"] -= 1
+            state["latency"] = latency if state["latency"] is None else 0.8 * state["latency"] + 0.2 * latency
+            if throttled:
+                state["throttled"] += 1
+            elif ok:
+                state["ok"] += 1
+            else:
+                state["failed"] += 1
+            if ok and latency <= self.target_latency:
+                state["rate"] = min(self.max_rate, state["rate"] + self.increase)
+                state["limit"] = min(self.max_concurrency, state["limit"] + 1.0 / state["limit"])
+            else:
+                state["rate"] = max(self.min_rate, state["rate"] * self.decrease)
+                state["limit"] = max(1.0, state["limit"] * self.decrease)
+                state["tokens"] = min(state["tokens"], 0.0)
+            self._condition.notify_all()
+
+    def summary(self):
+        lines = [f"Adaptive rate limiting: {self.waited:.1f}s waiting for tokens or slots"]
+        for host, state in sorted(self._hosts.items()):
+            lines.append(
+                f"  {host}: {state['rate']:.2f} req/s, concurrency {int(state['limit'])}, "
+                f"latency {state['latency'] or 0.0:.2f}s, {state['ok']} ok, {state['failed']} failed, "
+                f"{state['throttled']} throttled"
+            )
+        return "\n".join(lines)
+
+
+def _percentile(values, percent):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+class Metrics:
+    """Records per-phase wall time, WebDriver commands and network timings of a run.
+
+    Phases are timed with the phase() context manager; the WebDriver command
+    count comes from the counter installed by count_commands. Network timings
+    are read from the driver's performance log after each product. Raw records
+    are streamed to metrics.csv as they arrive; only per-phase totals and a
+    bounded sample for the percentiles are kept in memory.
+    """
+
+    # detail is the variant of a phase record and the URL of a network record
+    FIELDS = ["kind", "name", "product", "detail", "seconds", "commands", "status", "bytes"]
+
+    # Records kept per phase or resource type for p50/p95
+    SAMPLE_SIZE = 10000
+
+    def __init__(self, output_dir=None):
+        self.groups = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(0)
+        self._csv_file = None
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+            self._csv_file = open(os.path.join(output_dir, "metrics.csv"), "w", newline="", encoding="utf-8")
+            self._csv = csv.DictWriter(self._csv_file, fieldnames=self.FIELDS)
+            self._csv.writeheader()
+
+    def record(self, kind, name, product="", detail="", seconds=0.0, commands=0, status="", bytes=0):
+        row = {
+            "kind": kind, "name": name, "product": product, "detail": detail,
+            "seconds": round(seconds, 4), "commands": commands, "status": status, "bytes": bytes,
+        }
+        with self._lock:
+            if self._csv_file is not None:
+                self._csv.writerow(row)
+            group = self.groups.get((kind, name))
+            if group is None:
+                group = self.groups[(kind, name)] = {"count": 0, "seconds": 0.0, "bytes": 0, "samples": []}
+            group["count"] += 1
+            group["seconds"] += row["seconds"]
+            group["bytes"] += bytes
+            sample = (row["seconds"], commands)
+            if len(group["samples"]) < self.SAMPLE_SIZE:
+                group["samples"].append(sample)
+            else:
+                # Reservoir sampling: every record is equally likely to end up in the sample
+                slot = self._random.randrange(group["count"])
+                if slot < self.SAMPLE_SIZE:
+                    group["samples"][slot] = sample
+
+    @contextmanager
+    def phase(self, name, driver=None, product="", detail=""):
+        commands_before = getattr(driver, "command_count", 0)
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record("phase", name, product, detail, time.time() - start,
+                        getattr(driver, "command_count", 0) - commands_before)
+
+    def collect_network(self, driver, product=""):
+        """Drain the driver's performance log and record one entry per finished request."""
+        try:
+            entries = driver.get_log("performance")
+        except Exception:
+            return
+
+        pending = {}
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (ValueError, KeyError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            request_id = params.get("requestId")
+            if method == "Network.requestWillBeSent":
+                pending[request_id] = {
+                    "url": params["request"]["url"], "type": params.get("type", ""),
+                    "start": params["timestamp"], "status": "",
+                }
+            elif request_id not in pending:
+                continue
+            elif method == "Network.responseReceived":
+                pending[request_id]["status"] = params["response"].get("status", "")
+            elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                request = pending.pop(request_id)
+                status = request["status"] if method == "Network.loadingFinished" else "failed"
+                self.record("network", request["type"] or "Other", product, request["url"],
+                            params["timestamp"] - request["start"], 0, status,
+                            int(params.get("encodedDataLength", 0)))
+
+    def summary(self):
+        """p50/p95 of every phase and network resource type."""
+        with self._lock:
+            groups = sorted((key, dict(group, samples=list(group["samples"]))) for key, group in self.groups.items())
+
+        summary = []
+        for (kind, name), group in groups:
+            seconds = [sample[0] for sample in group["samples"]]
+            commands = [sample[1] for sample in group["samples"]]
+            summary.append({
+                "kind": kind,
+                "name": name,
+                "count": group["count"],
+                "total_seconds": round(group["seconds"], 3),
+                "p50_seconds": _percentile(seconds, 50),
+                "p95_seconds": _percentile(seconds, 95),
+                "p50_commands": _percentile(commands, 50),
+                "p95_commands": _percentile(commands, 95),
+                "bytes": group["bytes"],
+            })
+        return summary
+
+    def write(self, output_dir):
+        """Write the metrics.json summary and finish the streamed metrics.csv next to the output."""
+        os.makedirs(output_dir, exist_ok=True)
+        with self._lock:
+            if self._csv_file is not None:
+                self._csv_file.close()
+                self._csv_file = None
+        summary = self.summary()
+        with open(os.path.join(output_dir, "metrics.json"), "w", encoding="utf-8") as f:
+            json.dump({"summary": summary}, f, indent=2)
+
+        print(f"{'phase':<24}{'count':>7}{'p50 s':>9}{'p95 s':>9}{'p50 cmds':>10}{'p95 cmds':>10}")
+        for entry in summary:
+            if entry["kind"] == "phase":
+                print(f"{entry['name']:<24}{entry['count']:>7}{entry['p50_seconds']:>9.2f}{entry['p95_seconds']:>9.2f}"
+                      f"{entry['p50_commands']:>10}{entry['p95_commands']:>10}")
+        print(f"Metrics saved to {os.path.join(output_dir, 'metrics.json')}")
+
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/111.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:89.0) Gecko/20100101 Firefox/89.0",
+    "Mozilla/5.0 (Windows NT 10.0; WOW64; rv:51.0) Gecko/20100101 Firefox/51.0"
+]
+
+
+# URL patterns blocked per resource type in lean browser mode
+BLOCKED_RESOURCES = {
+    "image": ["*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*"],
+    "media": ["*.mp4*", "*.webm*", "*.mov*", "*.mp3*", "*.m3u8*"],
+    "font": ["*.woff*", "*.ttf*", "*.otf*", "*.eot*", "*fonts.googleapis.com*", "*fonts.shopifycdn.com*"],
+    "tracker": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googleadservices.com*",
+        "*connect.facebook.net*", "*bat.bing.com*", "*hotjar.com*", "*clarity.ms*", "*analytics.tiktok.com*",
+        "*ct.pinterest.com*", "*static.klaviyo.com*", "*tidio*", "*zdassets.com*", "*intercom*",
+        "*monorail-edge.shopifysvc.com*", "*/cdn/shopifycloud/*analytics*",
+    ],
+}
+
+
+def blocked_url_patterns(blocked_resources, unblocked_patterns=()):
+    """Return the CDP URL patterns for the chosen resource types.
+
+    Network.setBlockedURLs takes no exceptions, so this is not an allow-list
+    of URLs: a blocked pattern that mentions any string in unblocked_patterns
+    is dropped whole (e.g. "klaviyo.com" drops "*static.klaviyo.com*" and so
+    unblocks all of Klaviyo's static host). A URL that only matches a broad
+    pattern such as "*.png*" stays blocked.
+    """
+    patterns = []
+    for resource in blocked_resources:
+        for pattern in BLOCKED_RESOURCES[resource]:
+            if not any(unblocked in pattern for unblocked in unblocked_patterns) and pattern not in patterns:
+                patterns.append(pattern)
+    return patterns
+
+
+def build_options(page_load_strategy="normal"):
+    """Configure Edge options shared by every driver instance."""
     options = Options()
+    options.page_load_strategy = page_load_strategy
     options.add_argument("--headless")  
     options.add_argument("--disable-gpu")  
     options.add_argument("--no-sandbox") 
@@ -83,350 +538,2076 @@ def scrape_data(brands, start_page, end_page):      # Configure Edge options
 
     # Add desired capabilities using options
     options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    options.set_capability('ms:loggingPrefs', {'performance': 'ALL'})
     options.add_experimental_option("excludeSwitches", ["enable-automation"])
     options.add_experimental_option("useAutomationExtension", False)
 
     # Randomize user-agent
-    user_agent = random.choice([
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/111.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:89.0) Gecko/20100101 Firefox/89.0",
-        "Mozilla/5.0 (Windows NT 10.0; WOW64; rv:51.0) Gecko/20100101 Firefox/51.0"
-    ])
+    user_agent = random.choice(USER_AGENTS)
     options.add_argument(f"user-agent={user_agent}")
+    return options
 
-    # Initialize the WebDriver
-    driver = webdriver.Edge(options=options)
 
-    scraped_data = []
+def count_commands(driver):
+    """Count every WebDriver command sent through the driver in driver.command_count."""
+    execute = driver.execute
+    driver.command_count = 0
 
-    for brand_url in brands:
-        page = 1
-        product_links = []
-        
-        for page in range(start_page, end_page + 1):
-            print(f"Scraping page {page} of {brand_url}")
-            driver.get(f"{brand_url}?page={page}")
+    def counting_execute(driver_command, params=None):
+        driver.command_count += 1
+        return execute(driver_command, params)
+
+    driver.execute = counting_execute
+    return driver
+
+
+def create_driver(lean=False, blocked_resources=("image", "media", "font", "tracker"), unblocked_patterns=(),
+                  page_load_strategy="normal", page_load_timeout=60):
+    """Start a new Edge WebDriver with the shared options.
+
+    A lean driver blocks the chosen resource types through CDP. Only DOM text
+    and attributes are read, so blocked images still keep their src. A page
+    that takes longer than page_load_timeout to load raises TimeoutException.
+    """
+    driver = count_commands(webdriver.Edge(options=build_options(page_load_strategy)))
+    driver.set_page_load_timeout(page_load_timeout)
+    driver.set_script_timeout(page_load_timeout)
+    if lean:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_url_patterns(blocked_resources, unblocked_patterns)})
+    return driver
+
+
+def is_driver_alive(driver):
+    """Return True if the browser behind the driver still answers commands."""
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+class Checkpoint:
+    """Durable SQLite log of finished listing pages, products and their variants.
+
+    Every product is committed as soon as it is scraped, so a crashed run keeps
+    its work and a rerun with the same brands and page range resumes from it.
+    A run that scraped every product marks its checkpoint complete, and the
+    next run with the same settings starts from a fresh one. Product values
+    are stored once per product, variants in product order, and records are
+    read back one at a time.
+    """
+
+    # Part of the run key, so checkpoints in an older layout are not resumed
+    FORMAT = 2
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS listing_pages "
+                "(brand TEXT, page INTEGER, links TEXT, PRIMARY KEY (brand, page))"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS products (url TEXT PRIMARY KEY, seq INTEGER)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS product_records (seq INTEGER PRIMARY KEY, data TEXT)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS variants "
+                "(seq INTEGER, position INTEGER, variant_id TEXT, data TEXT, PRIMARY KEY (seq, position))"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS run (completed_at REAL)")
+
+    @classmethod
+    def for_run(cls, brands, start_page, end_page, directory=os.path.join("output", "checkpoints"), pipelined=False):
+        """Open the checkpoint shared by every run with the same brands and page range.
+
+        Pipelined runs number products by listing position rather than by
+        index, so they get a checkpoint of their own.
+        """
+        checkpoint = cls(cls.run_path(brands, start_page, end_page, directory, pipelined))
+        if checkpoint.is_complete():
+            print("The last run with these settings finished, starting a fresh checkpoint")
+            checkpoint.close()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(checkpoint.path + suffix):
+                    os.remove(checkpoint.path + suffix)
+            checkpoint = cls(checkpoint.path)
+        return checkpoint
+
+    @classmethod
+    def run_path(cls, brands, start_page, end_page, directory=os.path.join("output", "checkpoints"), pipelined=False):
+        """Path of the checkpoint for_run() opens for these settings."""
+        run = [cls.FORMAT, list(brands), start_page, end_page] + (["pipelined"] if pipelined else [])
+        key = hashlib.sha1(json.dumps(run).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(directory, f"{key}.sqlite")
+
+    def is_complete(self):
+        with self._lock:
+            return self._conn.execute("SELECT completed_at FROM run").fetchone() is not None
+
+    def mark_complete(self):
+        """Record that every product of the run was scraped, so it is not resumed."""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO run VALUES (?)", (time.time(),))
+
+    def listing_page(self, brand, page):
+        """Return the links recorded for a listing page, or None if it was never finished."""
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT links FROM listing_pages WHERE brand = ? AND page = ?", (brand, page)
+            ).fetchone()
+        return json.loads(found[0]) if found else None
+
+    def save_listing_page(self, brand, page, links):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO listing_pages VALUES (?, ?, ?)", (brand, page, json.dumps(links))
+            )
+
+    def done_products(self):
+        with self._lock:
+            return {url for (url,) in self._conn.execute("SELECT url FROM products")}
+
+    def save_product(self, seq, url, records):
+        """Append the variant records of a finished product and mark its URL done, atomically."""
+        with self._lock, self._conn:
+            if records:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO product_records VALUES (?, ?)",
+                    (seq, json.dumps(records[0].product.as_dict())),
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO variants VALUES (?, ?, ?, ?)",
+                [(seq, position, record.variant_id, json.dumps(record.as_dict()))
+                 for position, record in enumerate(records)],
+            )
+            self._conn.execute("INSERT OR REPLACE INTO products VALUES (?, ?)", (url, seq))
+
+    def renumber_product(self, url, seq):
+        """Move a finished product to another position in the output."""
+        with self._lock, self._conn:
+            found = self._conn.execute("SELECT seq FROM products WHERE url = ?", (url,)).fetchone()
+            if found is None or found[0] == seq:
+                return
+            for table in ("products", "product_records", "variants"):
+                self._conn.execute(f"UPDATE {table} SET seq = ? WHERE seq = ?", (seq, found[0]))
+
+    def iter_records(self):
+        """Yield every logged variant record in product order without loading them all."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT variants.seq, variants.data, product_records.data FROM variants "
+                "JOIN product_records ON product_records.seq = variants.seq ORDER BY variants.seq, variants.position"
+            )
+        product_seq, product = None, None
+        for seq, data, product_data in cursor:
+            if seq != product_seq:
+                product_seq, product = seq, ProductRecord(**json.loads(product_data))
+            yield VariantRecord(product, **json.loads(data))
+
+    def close(self):
+        self._conn.close()
+
+
+class ProductCache:
+    """Persistent per-handle cache of product fingerprints and their scraped records.
+
+    The fingerprint is the storefront's ETag for /products/<handle>.js when it
+    sends one, otherwise a SHA-256 of the JSON body. Products whose fingerprint
+    matches are re-emitted from the cache instead of being scraped again.
+    The spec table, coverage and price per sq ft live in the page HTML, not in
+    the JSON, so records scraped more than max_age_days ago are scraped again
+    even when the fingerprint matches. Handles that return 404 are evicted at
+    once; handles not seen for evict_after_days are evicted at the end of a run.
+    """
+
+    def __init__(self, session, path=os.path.join("cache", "products.sqlite"), evict_after_days=14,
+                 max_age_days=7):
+        self.session = session
+        self.path = path
+        self.evict_after_days = evict_after_days
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS products "
+                "(key TEXT PRIMARY KEY, etag TEXT, fingerprint TEXT, rows TEXT, seen_at REAL, scraped_at REAL)"
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(products)")]
+            if "scraped_at" not in columns:
+                # Caches written before scraped_at existed; their rows count as too old
+                self._conn.execute("ALTER TABLE products ADD COLUMN scraped_at REAL")
+
+    @staticmethod
+    def key(product_url):
+        handle = product_url.split('/')[-1].split('?')[0]
+        return f"{urlsplit(product_url).netloc}/{handle}"
+
+    def check(self, product_url, timeout=20):
+        """Return (cached variant records or None, fingerprint, product JSON) for a product URL.
+
+        Fingerprint is None when the product could not be checked or is
+        already cached, so there is nothing to store() for it. On a miss the
+        product JSON that was downloaded for the check is returned, so the
+        fast path does not fetch it again; otherwise it is None.
+        """
+        key = self.key(product_url)
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT etag, fingerprint, rows, scraped_at FROM products WHERE key = ?", (key,)
+            ).fetchone()
+        etag, fingerprint, data, scraped_at = found if found else (None, None, None, None)
+        try:
+            records = load_records(data) if data is not None else None
+        except (KeyError, TypeError, ValueError):
+            # Stored by a version with a different record layout
+            etag, records = None, None
+        if records is not None and (scraped_at or 0.0) < time.time() - self.max_age_days * 86400:
+            # Too old to trust for the HTML-only fields, whatever the JSON says
+            etag, records = None, None
+
+        handle = product_url.split('/')[-1].split('?')[0]
+        headers = {"If-None-Match": etag} if etag else {}
+        try:
+            response = self.session.get(f"{_store_url(product_url)}/products/{handle}.js", headers=headers,
+                                        timeout=timeout)
+        except requests.RequestException as e:
+            print(f"Cache check failed for {product_url}: {e}")
+            self._count("misses")
+            return None, None, None
+
+        if response.status_code == 404:
+            self._delete(key)
+            self._count("misses")
+            return None, None, None
+        if response.status_code == 304 and records is not None:
+            self._touch(key)
+            self._count("hits")
+            return records, None, None
+        if not response.ok:
+            self._count("misses")
+            return None, None, None
+
+        new_fingerprint = response.headers.get("ETag") or hashlib.sha256(response.content).hexdigest()
+        if records is not None and new_fingerprint == fingerprint:
+            self._touch(key)
+            self._count("hits")
+            return records, None, None
+        self._count("misses")
+        try:
+            product_json = response.json()
+        except ValueError:
+            product_json = None
+        return None, (response.headers.get("ETag"), new_fingerprint), product_json
+
+    def store(self, product_url, fingerprint, records):
+        """Remember the records scraped for a product under the fingerprint from check()."""
+        if fingerprint is None:
+            return
+        etag, fingerprint = fingerprint
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?, ?)",
+                (self.key(product_url), etag, fingerprint, dump_records(records), time.time(), time.time()),
+            )
+
+    def evict_stale(self):
+        """Drop handles that have not been listed for evict_after_days."""
+        cutoff = time.time() - self.evict_after_days * 86400
+        with self._lock, self._conn:
+            self.evicted += self._conn.execute("DELETE FROM products WHERE seen_at < ?", (cutoff,)).rowcount
+
+    def summary(self):
+        return f"Product cache: {self.hits} hits, {self.misses} misses, {self.evicted} evicted"
+
+    def close(self):
+        self._conn.close()
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _touch(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE products SET seen_at = ? WHERE key = ?", (time.time(), key))
+
+    def _delete(self, key):
+        with self._lock, self._conn:
+            self.evicted += self._conn.execute("DELETE FROM products WHERE key = ?", (key,)).rowcount
+
+
+def listing_pages(driver, brand_url, start_page, end_page, pacer=None, checkpoint=None, metrics=None):
+    """Walk the listing pages of a collection, yielding (page, product URLs) as each is read.
+
+    Pages already recorded in the checkpoint are read from it instead of the site.
+    """
+    pacer = pacer or Pacer("stealth")
+    metrics = metrics or Metrics()
+
+    for page in range(start_page, end_page + 1):
+        links = checkpoint.listing_page(brand_url, page) if checkpoint is not None else None
+        if links is not None:
+            if not links:
+                print(f"No products found on page {page}. Ending scrape.")
+                break
+            print(f"Resumed {len(links)} products from page {page}.")
+            yield page, links
+            continue
+
+        print(f"Scraping page {page} of {brand_url}")
+        page_url = f"{brand_url}?page={page}"
+        pacer.before_request(page_url)
+        with metrics.phase("listing_navigate", driver, page_url):
+            driver.get(page_url)
+
+            # Wait for the product grid, or for the page to finish loading if it is empty
+            pacer.wait_until(driver, lambda d: d.find_elements(By.CSS_SELECTOR, "a.product-item__image-wrapper") or _page_ready(d))
+
+        # Human-like interaction
+        pacer.humanize(driver, metrics, page_url)
         
-            # Human-like interaction
-            time.sleep(random.uniform(2, 5))
-            close_popup(driver)
-            time.sleep(2)
-            slow_smooth_scroll(driver, total_scroll_time=5)  # Scroll for 5 seconds
-            simulate_mouse_movement(driver)
-            
+        try:
+            products = driver.find_elements(By.CSS_SELECTOR, "a.product-item__image-wrapper")
+            links = [product.get_attribute("href") for product in products]
+            if checkpoint is not None:
+                checkpoint.save_listing_page(brand_url, page, links)
+        except Exception as e:
+            print(f"Error collecting product links on page {page}: {e}")
+            break
+        finally:
+            metrics.collect_network(driver, page_url)
+
+        if not links:
+            print(f"No products found on page {page}. Ending scrape.")
+            break
+        print(f"Scraped {len(links)} products from page {page}.")
+        yield page, links
+
+
+def collect_product_links(driver, brand_url, start_page, end_page, pacer=None, checkpoint=None, metrics=None):
+    """Walk the listing pages of a collection and return the product URLs."""
+    product_links = [
+        link for _, links in listing_pages(driver, brand_url, start_page, end_page, pacer, checkpoint, metrics)
+        for link in links
+    ]
+    print(f"Found {len(product_links)} products on {brand_url}.")
+    return product_links
+
+
+def products_json_pages(session, brand_url, start_page, end_page, page_size=24, pacer=None, checkpoint=None,
+                        timeout=20, metrics=None):
+    """Yield (page, product URLs) from the collection's products.json pagination.
+
+    Page N of products.json with limit=page_size lists the same products as
+    page N of the rendered collection. Stops at the first empty page and raises
+    BrowserRequired when the endpoint is not available; pages finished before
+    that are already in the checkpoint for the rendered fallback.
+    """
+    pacer = pacer or Pacer("stealth")
+    metrics = metrics or Metrics()
+
+    for page in range(start_page, end_page + 1):
+        links = checkpoint.listing_page(brand_url, page) if checkpoint is not None else None
+        if links is None:
+            page_url = f"{brand_url}/products.json?limit={page_size}&page={page}"
+            pacer.before_request(page_url)
             try:
-                products = driver.find_elements(By.CSS_SELECTOR, "a.product-item__image-wrapper")
-                if not products:
-                    print(f"No products found on page {page}. Ending scrape.")
-                    break
-        
-                for product in products:
-                    href = product.get_attribute("href")
-                    product_links.append(href)
-        
-                print(f"Scraped {len(products)} products from page {page}.")
-            except Exception as e:
-                print(f"Error collecting product links on page {page}: {e}")
+                with metrics.phase("listing_fetch", product=page_url):
+                    response = session.get(page_url, timeout=timeout)
+                response.raise_for_status()
+                products = response.json()["products"]
+            except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+                raise BrowserRequired(f"products.json unavailable for {brand_url} page {page}: {e}")
+            links = [f"{brand_url}/products/{product['handle']}" for product in products]
+            if checkpoint is not None:
+                checkpoint.save_listing_page(brand_url, page, links)
+            print(f"Discovered {len(links)} products on page {page} of {brand_url}.")
+
+        if not links:
+            print(f"No products found on page {page}. Ending scrape.")
+            break
+        yield page, links
+
+
+def discover_product_links(session, brand_url, start_page, end_page, page_size=24, pacer=None, checkpoint=None,
+                           timeout=20, metrics=None):
+    """Collect product URLs from the collection's products.json, see products_json_pages()."""
+    product_links = [
+        link for _, links in products_json_pages(session, brand_url, start_page, end_page, page_size, pacer,
+                                                 checkpoint, timeout, metrics)
+        for link in links
+    ]
+    print(f"Found {len(product_links)} products on {brand_url}.")
+    return product_links
+
+
+def unique_links(product_links):
+    """Drop repeated product URLs, keeping the first occurrence."""
+    seen = set()
+    unique = []
+    for link in product_links:
+        if link not in seen:
+            seen.add(link)
+            unique.append(link)
+    return unique
+
+
+# Spec table rows copied into "Body (HTML)" for every variation
+MULTI_VARIANT_FIELDS = [
+    "Weight", "Width", "UOM", "Length", "Thickness", "Collection", "Composition",
+    "Design", "Ends", "Edges", "Surface Type", "Installation Type",
+    "Usage", "Application"
+]
+SINGLE_VARIANT_FIELDS = ["PCs per box", "Coverage Area", "Color Shade"] + MULTI_VARIANT_FIELDS
+
+
+def read_product(driver, product_url, num_variations):
+    """Read the product-level fields through individual WebDriver lookups."""
+    title = driver.find_element(By.CSS_SELECTOR, "h1.product-meta__title.heading.h1").text.strip()
+
+    # Extract handle from the URL
+    handle = product_url.split('/')[-1].split('?')[0]
+
+    # Get all images
+    image_elements = driver.find_elements(By.CSS_SELECTOR, ".product-gallery__thumbnail img")
+    all_image_src = [img.get_attribute("src") for img in image_elements]
+
+    # Breadcrumb type
+    breadcrumb_type = ""
+    try:
+        breadcrumb_type = driver.find_element(
+            By.CSS_SELECTOR, "li.breadcrumb__item a[href*='types']"
+        ).text.strip()
+    except:
+        pass
+
+    # Vendor
+    vendor = driver.find_element(By.CSS_SELECTOR, "a.product-meta__vendor").text.strip()
+
+    # Option 1 (e.g., Size)
+    option1_value = driver.find_element(By.CSS_SELECTOR, "span.block-swatch__item-text").text.strip()
+
+    # SEO description
+    product_description_box = ""
+    try:
+        seo_description_element = driver.find_element(By.CSS_SELECTOR, "div.rte.text--pull > p")
+        product_description_box = seo_description_element.text.strip()
+    except:
+        pass
+
+    # Applications and usage tags
+    application = ""
+    usage = ""
+    try:
+        application = driver.find_element(By.XPATH, "//tr[th[contains(text(), 'Application:')]]").text.strip()
+        application = application.split(':', 1)[1].strip()
+    except:
+        pass
+
+    try:
+        usage = driver.find_element(By.XPATH, "//tr[th[contains(text(), 'Usage:')]]").text.strip()
+        usage = usage.split(':', 1)[1].strip()
+    except:
+        pass
+
+    # Surface type attribute
+    surface_attribute = ""
+    try:
+        surface_type = driver.find_element(By.XPATH, "//tr[th[contains(text(), 'Surface Type:')]]").text.strip()
+        surface_attribute = surface_type.split(':', 1)[1].strip()
+    except:
+        pass
+
+    return make_product(handle, title, vendor, breadcrumb_type, option1_value, product_description_box,
+                        application, usage, surface_attribute, all_image_src, num_variations)
+
+
+def read_variant(driver, variant_id, variation_name, multi_variant, all_image_src):
+    """Read the fields of the currently selected variation through WebDriver lookups."""
+    option2_value = driver.find_element(By.CSS_SELECTOR, "span.product-form__selected-value").text.strip()
+    variant_sku = driver.find_element(By.CSS_SELECTOR, "span.product-meta__sku-number").text.strip()
+
+    # Extract correct price based on variant_id
+    variant_price = None
+    variant_compare_price = None
+    if multi_variant:
+        for price_element in driver.find_elements(By.CSS_SELECTOR, "span.box-price-pcsPerCarton"):
+            if price_element.get_attribute("data-id") == variant_id:
+                variant_price = price_element.get_attribute("data-price")
+                variant_compare_price = price_element.get_attribute("data-compare-price")
                 break
+    else:
+        variant_price = driver.find_element(By.CSS_SELECTOR, "span.box-price-pcsPerCarton").get_attribute("data-price")
+        variant_compare_price = driver.find_element(By.CSS_SELECTOR, "span.box-price-pcsPerCarton").get_attribute("data-compare-price")
 
-        print(f"Found {len(product_links)} products on {brand_url}.")
+    price_per_sq_ft_text = ""
+    try:
+        price_per_sq_ft_element = driver.find_element(By.CSS_SELECTOR, "span.price.price--highlight")
+        price_per_sq_ft_text = price_per_sq_ft_element.text.strip().replace("Sale price", "").strip()
+    except Exception as e:
+        print(f"Price Per Sq Ft Error: {e}")
 
-        count = 1
-        for product_url in product_links:
-            print(product_url)
-            try:
-                driver.get(product_url)
-                time.sleep(3)
+    original_price = ""
+    try:
+        original_price_text = driver.find_element(By.CSS_SELECTOR, "span.price.price--compare").text.strip()
+        original_price = original_price_text.replace("Regular price", "").strip()
+    except:
+        pass
+
+    variant_barcode = ""
+    # Every variant has its own hidden barcode row, so match it by the variant id
+    barcode_selector = "tr.table-row-spec.barcode-container"
+    if multi_variant:
+        barcode_selector += f"[data-id='{variant_id}']"
+    try:
+        variant_barcode = driver.find_element(By.CSS_SELECTOR, barcode_selector).get_attribute("data-value")
+    except:
+        pass
+
+    weight = ""
+    try:
+        weight_container = driver.find_element(By.XPATH, "//tr[th[contains(text(), 'Weight:')]]")
+        weight = weight_container.find_element(By.CSS_SELECTOR, "td.spec-values").text.strip()
+    except:
+        pass
 
-                driver.execute_script("window.scrollBy(0, 100)")
+    uom = driver.find_element(By.XPATH, "//tr[th[contains(text(), 'UOM:')]]").get_attribute("outerHTML")
+    # get the text from uom
+    uom = uom.split('<td class="spec-values">')[1].split('</td>')[0]
+
+    # Find all <tr> tags with the matching data-id
+    rows = driver.find_elements(By.CSS_SELECTOR, f"tr[data-id='{variant_id}']")
+    tr_tags_html = [row.get_attribute("outerHTML") for row in rows]
+
+    # Collect additional fields by matching specific table headers
+    field_rows_html = []
+    for field in (MULTI_VARIANT_FIELDS if multi_variant else SINGLE_VARIANT_FIELDS):
+        try:
+            # Locate the <tr> row with the specific field header and add its outerHTML
+            field_rows_html.append(
+                driver.find_element(By.XPATH, f"//tr[th[contains(text(), '{field}:')]]").get_attribute("outerHTML")
+            )
+        except Exception as e:
+            # Skip if the field is not found
+            print(f"Field '{field}' not found. Skipping. Error: {e}")
+
+    seo_description_element = driver.find_element(By.CSS_SELECTOR, "div.rte.text--pull > p")
+    variant_description = seo_description_element.text.strip()
+
+    selected_image_url = ""
+    if multi_variant:
+        try:
+            selected_image_element = driver.find_element(By.CSS_SELECTOR, ".product-gallery__carousel-item.is-selected img")
+            selected_image_url = selected_image_element.get_attribute("src")
+        except Exception as e:
+            print(f"Error finding selected image: {e}")
+
+    return make_variant(variant_id, variation_name, option2_value, variant_sku, variant_price,
+                        variant_compare_price, price_per_sq_ft_text, original_price, variant_barcode,
+                        weight, uom, tr_tags_html, field_rows_html, variant_description,
+                        selected_image_url, all_image_src, multi_variant)
+
+
+def _is_hidden(tag):
+    """Approximate WebDriver visibility: hidden elements have no visible text."""
+    while tag is not None and tag.name not in ("[document]", "html"):
+        style = (tag.get("style") or "").replace(" ", "").lower()
+        if tag.has_attr("hidden") or "display:none" in style or "d-none" in (tag.get("class") or []):
+            return True
+        tag = tag.parent
+    return False
+
+
+def _text(tag):
+    """Return the visible text of a parsed element the way WebElement.text would."""
+    if tag is None:
+        raise ValueError("element not found in page snapshot")
+    if _is_hidden(tag):
+        return ""
+    return " ".join(tag.get_text(" ").split())
+
+
+def _spec_rows(soup):
+    """Index every <tr> by the first text node of its <th>, in document order."""
+    spec_rows = []
+    for th in soup.find_all("th"):
+        first_text = th.find(string=True, recursive=False)
+        if first_text and th.parent is not None and th.parent.name == "tr":
+            spec_rows.append((str(first_text), th.parent))
+    return spec_rows
+
+
+def _find_spec_row(spec_rows, field):
+    """Snapshot equivalent of //tr[th[contains(text(), '<field>:')]]."""
+    label = f"{field}:"
+    for text, row in spec_rows:
+        if label in text:
+            return row
+    return None
+
+
+def _spec_value(spec_rows, field):
+    row = _find_spec_row(spec_rows, field)
+    if row is None:
+        return ""
+    try:
+        return _text(row).split(':', 1)[1].strip()
+    except IndexError:
+        return ""
 
-                title = driver.find_element(By.CSS_SELECTOR, "h1.product-meta__title.heading.h1").text.strip()
 
-                # Extract handle from the URL
-                handle = product_url.split('/')[-1].split('?')[0]
+def parse_product_snapshot(soup, product_url, num_variations):
+    """Pull the product-level fields out of one parsed page_source snapshot."""
+    spec_rows = _spec_rows(soup)
 
-                # Locate all variations
-                variations = driver.find_elements(By.CSS_SELECTOR, ".variant-swatch__radio")[::-1]
-                num_variations = len(variations)
+    title = _text(soup.select_one("h1.product-meta__title.heading.h1")).strip()
+    handle = product_url.split('/')[-1].split('?')[0]
 
-                # Get all images
-                image_elements = driver.find_elements(By.CSS_SELECTOR, ".product-gallery__thumbnail img")
-                all_image_src = [img.get_attribute("src") for img in image_elements]
+    # src attributes are made absolute just like WebElement.get_attribute("src")
+    all_image_src = [
+        urljoin(product_url, img.get("src")) if img.get("src") else None
+        for img in soup.select(".product-gallery__thumbnail img")
+    ]
 
-                # Filtered images (non-variation images)
-                filtered_images = all_image_src[:len(all_image_src) - num_variations]
-                variation_images = all_image_src[-num_variations:][::-1]  # Reverse variation images
+    breadcrumb = soup.select_one("li.breadcrumb__item a[href*='types']")
+    breadcrumb_type = _text(breadcrumb).strip() if breadcrumb is not None else ""
 
-                # Breadcrumb type
-                breadcrumb_type = ""
-                try:
-                    breadcrumb_type = driver.find_element(
-                        By.CSS_SELECTOR, "li.breadcrumb__item a[href*='types']"
-                    ).text.strip()
-                except:
-                    pass
+    vendor = _text(soup.select_one("a.product-meta__vendor")).strip()
+    option1_value = _text(soup.select_one("span.block-swatch__item-text")).strip()
 
-                # Vendor
-                vendor = driver.find_element(By.CSS_SELECTOR, "a.product-meta__vendor").text.strip()
+    description = soup.select_one("div.rte.text--pull > p")
+    product_description_box = _text(description).strip() if description is not None else ""
 
-                # Option 1 (e.g., Size)
-                option1_value = driver.find_element(By.CSS_SELECTOR, "span.block-swatch__item-text").text.strip()
+    return make_product(handle, title, vendor, breadcrumb_type, option1_value, product_description_box,
+                        _spec_value(spec_rows, "Application"), _spec_value(spec_rows, "Usage"),
+                        _spec_value(spec_rows, "Surface Type"), all_image_src, num_variations)
 
-                # SEO description
-                product_description_box = ""
-                try:
-                    seo_description_element = driver.find_element(By.CSS_SELECTOR, "div.rte.text--pull > p")
-                    product_description_box = seo_description_element.text.strip()
-                except:
-                    pass
 
-                # Applications and usage tags
-                application = ""
-                usage = ""
-                try:
-                    application = driver.find_element(By.XPATH, "//tr[th[contains(text(), 'Application:')]]").text.strip()
-                    application = application.split(':', 1)[1].strip()
-                except:
-                    pass
+def parse_variant_snapshot(soup, page_url, variant_id, variation_name, multi_variant, all_image_src):
+    """Pull the fields of the selected variation out of one parsed page_source snapshot."""
+    spec_rows = _spec_rows(soup)
+
+    option2_value = _text(soup.select_one("span.product-form__selected-value")).strip()
+    variant_sku = _text(soup.select_one("span.product-meta__sku-number")).strip()
+
+    variant_price = None
+    variant_compare_price = None
+    price_elements = soup.select("span.box-price-pcsPerCarton")
+    if multi_variant:
+        for price_element in price_elements:
+            if price_element.get("data-id") == variant_id:
+                variant_price = price_element.get("data-price")
+                variant_compare_price = price_element.get("data-compare-price")
+                break
+    else:
+        if not price_elements:
+            raise ValueError("span.box-price-pcsPerCarton not found in page snapshot")
+        variant_price = price_elements[0].get("data-price")
+        variant_compare_price = price_elements[0].get("data-compare-price")
+
+    price_per_sq_ft_text = ""
+    price_per_sq_ft_element = soup.select_one("span.price.price--highlight")
+    if price_per_sq_ft_element is not None:
+        price_per_sq_ft_text = _text(price_per_sq_ft_element).replace("Sale price", "").strip()
+    else:
+        print("Price Per Sq Ft Error: span.price.price--highlight not found")
+
+    original_price = ""
+    original_price_element = soup.select_one("span.price.price--compare")
+    if original_price_element is not None:
+        original_price = _text(original_price_element).replace("Regular price", "").strip()
+
+    # Every variant has its own hidden barcode row, so match it by the variant id
+    barcode_selector = "tr.table-row-spec.barcode-container"
+    if multi_variant:
+        barcode_selector += f"[data-id='{variant_id}']"
+    barcode_element = soup.select_one(barcode_selector)
+    variant_barcode = barcode_element.get("data-value", "") if barcode_element is not None else ""
+
+    weight = ""
+    weight_container = _find_spec_row(spec_rows, "Weight")
+    if weight_container is not None and weight_container.select_one("td.spec-values") is not None:
+        weight = _text(weight_container.select_one("td.spec-values")).strip()
+
+    uom_row = _find_spec_row(spec_rows, "UOM")
+    if uom_row is None or uom_row.select_one("td.spec-values") is None:
+        raise ValueError("UOM row not found in page snapshot")
+    uom = uom_row.select_one("td.spec-values").decode_contents()
+
+    tr_tags_html = [str(row) for row in soup.select(f"tr[data-id='{variant_id}']")]
+
+    field_rows_html = []
+    for field in (MULTI_VARIANT_FIELDS if multi_variant else SINGLE_VARIANT_FIELDS):
+        row = _find_spec_row(spec_rows, field)
+        if row is None:
+            print(f"Field '{field}' not found. Skipping.")
+            continue
+        field_rows_html.append(str(row))
+
+    variant_description = _text(soup.select_one("div.rte.text--pull > p")).strip()
+
+    selected_image_url = ""
+    if multi_variant:
+        selected_image_element = soup.select_one(".product-gallery__carousel-item.is-selected img")
+        if selected_image_element is not None and selected_image_element.get("src"):
+            selected_image_url = urljoin(page_url, selected_image_element.get("src"))
+        else:
+            print("Error finding selected image: .product-gallery__carousel-item.is-selected img")
+
+    return make_variant(variant_id, variation_name, option2_value, variant_sku, variant_price,
+                        variant_compare_price, price_per_sq_ft_text, original_price, variant_barcode,
+                        weight, uom, tr_tags_html, field_rows_html, variant_description,
+                        selected_image_url, all_image_src, multi_variant)
+
+
+def make_product(handle, title, vendor, breadcrumb_type, option1_value, product_description_box,
+                 application, usage, surface_attribute, all_image_src, num_variations):
+    """Bundle the product-level values shared by every variation row."""
+    tags = application + usage
+    tags = tags.replace(" | ", ", ")
+
+    # Filtered images (non-variation images)
+    filtered_images = all_image_src[:len(all_image_src) - num_variations]
+
+    return {
+        "handle": handle,
+        "title": title,
+        "vendor": vendor,
+        "breadcrumb_type": breadcrumb_type,
+        "tags": tags,
+        "option1_value": option1_value,
+        "product_description_box": product_description_box,
+        "surface_attribute": surface_attribute,
+        "all_image_src": all_image_src,
+        "filtered_images": filtered_images,
+        "image_positions": list(range(1, len(filtered_images) + 1)),
+    }
+
+
+def make_variant(variant_id, variation_name, option2_value, variant_sku, variant_price,
+                 variant_compare_price, price_per_sq_ft_text, original_price, variant_barcode,
+                 weight, uom, tr_tags_html, field_rows_html, variant_description,
+                 selected_image_url, all_image_src, multi_variant):
+    """Bundle the values of one variation."""
+    if not multi_variant:
+        if len(all_image_src) > 1:  # Ensure there is a second element before accessing index 1
+            selected_image_url = all_image_src[1]
+        elif len(all_image_src) > 0:  # Fallback to first image if only one exists
+            selected_image_url = all_image_src[0]
+
+    return {
+        "variant_id": variant_id,
+        "variation_name": variation_name,
+        "option2_value": option2_value,
+        "variant_sku": variant_sku,
+        "variant_price": variant_price,
+        "variant_compare_price": variant_compare_price,
+        "price_per_sq_ft_text": price_per_sq_ft_text,
+        "original_price": original_price,
+        "variant_barcode": variant_barcode,
+        "weight": weight,
+        "uom": uom,
+        "tr_tags_html": tr_tags_html,
+        "field_rows_html": field_rows_html,
+        "variant_description": variant_description,
+        "selected_image_url": selected_image_url,
+    }
+
+
+class _Record:
+    """A slotted record whose FIELDS serialize to and from a plain dict."""
+
+    __slots__ = ()
+    FIELDS = ()
+
+    def __init__(self, **values):
+        for name in self.FIELDS:
+            setattr(self, name, values[name])
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+
+class ProductRecord(_Record):
+    """The product-level values shared by every variant of a product, held once."""
+
+    FIELDS = ("handle", "title", "vendor", "type", "tags", "size", "description", "surface", "images",
+              "image_positions")
+    __slots__ = FIELDS
+
+
+class VariantRecord(_Record):
+    """One variant of a product, expanded into a flat Shopify import row by row().
+
+    spec_rows are the interned <tr> strings of the variant's Body (HTML) table;
+    the rows every variant shares are then stored once per process.
+    """
+
+    FIELDS = ("variant_id", "position", "variation", "color", "sku", "price", "compare_price", "barcode", "weight",
+              "description", "coverage_area", "pcs_per_box", "price_per_sq_ft", "image", "original_price", "uom",
+              "spec_rows")
+    __slots__ = FIELDS + ("product",)
+
+    def __init__(self, product, **values):
+        super().__init__(**values)
+        self.product = product
+        self.spec_rows = tuple(sys.intern(html) for html in self.spec_rows)
+
+    def row(self, product_values=True):
+        """Return the Shopify import row; product-only columns are blank unless product_values."""
+        product = self.product
+        idx = self.position
+        row = {
+            "Handle": product.handle,
+            "Title": product.title,
+            "Variation": self.variation,
+            "Body (HTML)": "<table>" + "".join(self.spec_rows) + "</table>",
+            "Vendor": product.vendor,
+            "Type": product.type,
+            "Tags": product.tags,
+            "Option1 Name": "Color",
+            "Option1 Value": self.color,
+            "Option2 Name": "Size",
+            "Option2 Value": product.size,
+            "Variant SKU": self.sku,
+            "Variant Grams": " ",
+            "Variant Inventory Tracker": "shopify",
+            "Variant Inventory Qty": "50000",
+            "Variant Inventory Policy": "deny",
+            "Variant Fulfillment Service": "manual",
+            "Variant Price": self.price,
+            "Variant Compare At Price": self.compare_price,
+            "Variant Requires Shipping": "TRUE",
+            "Variant Taxable": "TRUE",
+            "Variant Barcode": self.barcode,
+            "Variant Weight Unit": " ",
+            "Gift Card": "FALSE",
+            "Weight": self.weight,
+            "SEO Title": product.title,
+            "Product description box = Product Details Field (product.metafields.custom.product_details_field)": product.description,
+            "Google Shopping / Condition": " ",
+            "Status": "active",
+            "Variant Description": self.description,
+            "Coverage Area (product.metafields.custom.coverage_area)": self.coverage_area,
+            "pcsperbox (product.metafields.custom.pcsperbox)": self.pcs_per_box,
+            "Price Per Sq Ft (product.metafields.custom.price_per_sq_ft)": self.price_per_sq_ft,
+            "Image Src": product.images[idx] if idx < len(product.images) else "",
+            "Variant Image": self.image,
+            "Image Position": product.image_positions[idx] if idx < len(product.image_positions) else None,
+            "Original Price": self.original_price,
+            "Surface Type (product.metafields.custom.surface_type)": product.surface,
+            "uom (product.metafields.custom.uom)": self.uom,
+        }
+        if not product_values:
+            for column in PRODUCT_ONLY_COLUMNS:
+                row[column] = ""
+        return row
+
+
+# Columns Shopify only reads from the first row of each handle. Body (HTML) is
+# not one of them: it holds each variant's own spec rows, so it is kept per row.
+PRODUCT_ONLY_COLUMNS = (
+    "Title", "Vendor", "Type", "Tags", "Option1 Name", "Option2 Name", "Gift Card", "SEO Title",
+    "Product description box = Product Details Field (product.metafields.custom.product_details_field)",
+    "Google Shopping / Condition", "Status", "Surface Type (product.metafields.custom.surface_type)",
+)
+
+
+def expand_rows(records, product_values_once=False):
+    """Yield the flat import rows of variant records in order.
+
+    With product_values_once, product-only columns are filled on the first
+    row of each handle and left blank on the rows after it.
+    """
+    previous_handle = None
+    for record in records:
+        yield record.row(product_values=not product_values_once or record.product.handle != previous_handle)
+        previous_handle = record.product.handle
+
+
+def dump_records(records):
+    """Serialize the variant records of one product, storing the product once."""
+    if not records:
+        return json.dumps({"product": None, "variants": []})
+    return json.dumps({
+        "product": records[0].product.as_dict(),
+        "variants": [record.as_dict() for record in records],
+    })
+
+
+def load_records(data):
+    data = json.loads(data)
+    if not data["variants"]:
+        return []
+    product = ProductRecord(**data["product"])
+    return [VariantRecord(product, **variant) for variant in data["variants"]]
+
+
+def product_record(product):
+    """Build the shared record of a product from its extracted values."""
+    return ProductRecord(
+        handle=product["handle"],
+        title=product["title"],
+        vendor=product["vendor"],
+        type=product["breadcrumb_type"],
+        tags=product["tags"],
+        size=product["option1_value"],
+        description=product["product_description_box"],
+        surface=product["surface_attribute"],
+        images=product["filtered_images"],
+        image_positions=product["image_positions"],
+    )
+
+
+def variant_record(product, variant, idx):
+    """Build the record of one variation of a product record."""
+    # The <tr> tags matching the data-id followed by the additional spec rows
+    spec_rows = list(variant["tr_tags_html"]) + list(variant["field_rows_html"])
+    soup = BeautifulSoup("<table>" + "".join(spec_rows) + "</table>", "html.parser")
+
+    # Extract Coverage Area from <tr> where <th> contains 'Coverage Area'
+    coverage_area = ""
+    try:
+        coverage_area_element = soup.find("tr", class_="coverage-area-container")
+        if coverage_area_element:
+            coverage_area = coverage_area_element["data-value"].strip()
+    except:
+        pass
+
+    # Extract PCs per Box from <tr> where <th> contains 'PCs per Box'
+    pcs_per_box = ""
+    try:
+        pcs_per_box_element = soup.find("tr", class_="pcsPerBox-container")
+        if pcs_per_box_element:
+            pcs_per_box = pcs_per_box_element["data-value"].strip()
+    except:
+        pass
+
+    return VariantRecord(
+        product,
+        variant_id=variant["variant_id"],
+        position=idx,
+        variation=variant["variation_name"],
+        color=variant["option2_value"],
+        sku=variant["variant_sku"],
+        price=variant["variant_price"],
+        compare_price=variant["variant_compare_price"],
+        barcode=variant["variant_barcode"],
+        weight=variant["weight"],
+        description=variant["variant_description"],
+        coverage_area=coverage_area,
+        pcs_per_box=pcs_per_box,
+        price_per_sq_ft=variant["price_per_sq_ft_text"],
+        image=variant["selected_image_url"],
+        original_price=variant["original_price"],
+        uom=variant["uom"],
+        spec_rows=spec_rows,
+    )
+
+
+def scrape_product(driver, product_url, extraction="webdriver", pacer=None, metrics=None):
+    """Scrape every variation of a single product page and return its variant records.
+
+    With extraction="snapshot" each page state is read from a single
+    driver.page_source call instead of one WebDriver round-trip per field.
+    With extraction="dom" all variations are read from the first page load,
+    falling back to "snapshot" when the page does not carry the product JSON.
+    """
+    pacer = pacer or Pacer("stealth")
+    metrics = metrics or Metrics()
+    records = []
+
+    with metrics.phase("navigate", driver, product_url):
+        try:
+            with pacer.request(product_url):
+                driver.get(product_url)
+        except TimeoutException as e:
+            raise BrowserStuck(f"page load timed out: {e.msg}")
+        if not pacer.wait_until(driver, EC.presence_of_element_located((By.CSS_SELECTOR, "h1.product-meta__title")),
+                                timeout=15):
+            raise_if_challenged(driver)
+    pacer.pause("product_delay")
+
+    driver.execute_script("window.scrollBy(0, 100)")
+
+    if extraction == "dom":
+        try:
+            with metrics.phase("dom_extraction", driver, product_url):
+                return scrape_product_dom(driver, product_url, pacer=pacer)
+        except BrowserRequired as e:
+            print(f"Falling back to clicking variations for {product_url}: {e}")
+            extraction = "snapshot"
+
+    # Locate all variations
+    variations = driver.find_elements(By.CSS_SELECTOR, ".variant-swatch__radio")[::-1]
+    num_variations = len(variations)
+    multi_variant = num_variations > 1
+
+    with metrics.phase("product_fields", driver, product_url):
+        if extraction == "snapshot":
+            soup = BeautifulSoup(driver.page_source, "lxml")
+            product = parse_product_snapshot(soup, product_url, num_variations)
+            # Radio ids and values come from the same snapshot, in the same order
+            radio_attributes = [(radio.get("id"), radio.get("value")) for radio in soup.select(".variant-swatch__radio")[::-1]]
+        else:
+            product = read_product(driver, product_url, num_variations)
+
+    all_image_src = product["all_image_src"]
+    shared = product_record(product)
+
+    for idx, variation in enumerate(variations):
+        if extraction == "snapshot":
+            variation_id, variation_name = radio_attributes[idx]
+        else:
+            variation_id = variation.get_attribute('id')
+            variation_name = None
+        with metrics.phase("variant_click", driver, product_url, variation_id):
+            label = driver.find_element(By.CSS_SELECTOR, f"label[for='{variation_id}']")
+
+            # Scroll to the label and click it
+            previous_url = driver.current_url
+            ActionChains(driver).move_to_element(label).perform()
+            WebDriverWait(driver, 10).until(EC.element_to_be_clickable(label)).click()
+
+            # Selecting another variant rewrites the URL to its variant= id
+            if multi_variant:
+                pacer.wait_until(driver, _url_changed(previous_url), timeout=5)
+            pacer.pause("variant_delay")
+
+        # Extract variation-specific details
+        current_url = driver.current_url
+        variant_id = current_url.split("variant=")[-1]
+
+        with metrics.phase("variant_fields", driver, product_url, variant_id):
+            if extraction == "snapshot":
+                soup = BeautifulSoup(driver.page_source, "lxml")
+                variant = parse_variant_snapshot(soup, current_url, variant_id, variation_name,
+                                                 multi_variant, all_image_src)
+            else:
+                variation_name = variation.get_attribute("value")
+                variant = read_variant(driver, variant_id, variation_name, multi_variant, all_image_src)
+
+        records.append(variant_record(shared, variant, idx))
+    return records
+
+
+class BrowserRequired(Exception):
+    """Raised when a product cannot be scraped without rendering it in a browser."""
+
+
+def create_session(pool_size=10):
+    """Create a pooled requests.Session shared by all fast-path workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENTS[0]
+    return session
+
+
+def _store_url(url):
+    """Return the scheme and host of a storefront URL."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _absolute_url(src):
+    """Shopify JSON hands out protocol-relative CDN URLs."""
+    if src and src.startswith("//"):
+        return "https:" + src
+    return src or ""
+
+
+def _money(cents):
+    """Format an integer amount in cents the way the storefront prints prices."""
+    if cents in (None, ""):
+        return ""
+    return f"${int(cents) / 100:,.2f}"
+
+
+def fetch_product_json(session, product_url, timeout=20):
+    """Fetch the storefront's /products/<handle>.js JSON for a product URL."""
+    handle = product_url.split('/')[-1].split('?')[0]
+    response = session.get(f"{_store_url(product_url)}/products/{handle}.js", timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def _embedded_product_json(soup):
+    """Return the product JSON the theme embeds in the page, if any."""
+    for script in soup.select("script[type='application/json']"):
+        try:
+            data = json.loads(script.string or "")
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            product_json = data.get("product", data)
+            if isinstance(product_json, dict) and "variants" in product_json:
+                return product_json
+    return None
+
+
+def _selected_variant_rows(soup, variant_id):
+    """The variant's spec rows as they read once the variant is selected in the page.
+
+    The theme script shows a variant's rows by dropping d-none from them when
+    it is selected, except for the barcode row, which stays hidden. The soup
+    itself is left untouched.
+    """
+    rows = []
+    for row in soup.select(f"tr[data-id='{variant_id}']"):
+        row = copy.copy(row)
+        classes = row.get("class") or []
+        if "barcode-container" not in classes and "d-none" in classes:
+            row["class"] = [name for name in classes if name != "d-none"]
+        rows.append(str(row))
+    return rows
+
+
+def records_from_product_json(soup, product_url, product_json, resolve_image=None):
+    """Build every variant record from one parsed page and the product JSON.
+
+    Swatch values are mapped to variant ids through the JSON, so no variant has
+    to be selected in the page. resolve_image(radio) is called for variants
+    whose image is not in the JSON; BrowserRequired is raised when the page
+    lacks a field the records need.
+    """
+    radios = soup.select(".variant-swatch__radio")[::-1]
+    num_variations = len(radios)
+    multi_variant = num_variations > 1
 
+    try:
+        product = parse_product_snapshot(soup, product_url, num_variations)
+    except ValueError as e:
+        raise BrowserRequired(f"product fields missing from server HTML: {e}")
+
+    # The JSON is the source of truth for product-level values it carries
+    product["title"] = product_json.get("title") or product["title"]
+    product["vendor"] = product_json.get("vendor") or product["vendor"]
+    product["breadcrumb_type"] = product["breadcrumb_type"] or product_json.get("type") or ""
+    all_image_src = [_absolute_url(src) for src in product_json.get("images", [])]
+    if all_image_src:
+        filtered_images = all_image_src[:len(all_image_src) - num_variations]
+        product["all_image_src"] = all_image_src
+        product["filtered_images"] = filtered_images
+        product["image_positions"] = list(range(1, len(filtered_images) + 1))
+    all_image_src = product["all_image_src"]
+    shared = product_record(product)
+
+    variants = product_json.get("variants", [])
+    available = [variant for variant in variants if variant.get("available")]
+    default_variant = (available or variants or [None])[0]
+
+    records = []
+    for idx, radio in enumerate(radios):
+        variation_name = radio.get("value")
+        variant_json = next((v for v in variants if variation_name in (v.get("options") or [])), None)
+        if variant_json is None:
+            raise BrowserRequired(f"no variant in product JSON for swatch '{variation_name}'")
+        variant_id = str(variant_json["id"])
+
+        try:
+            variant = parse_variant_snapshot(soup, product_url, variant_id, variation_name,
+                                             multi_variant, all_image_src)
+        except ValueError as e:
+            raise BrowserRequired(f"variant fields missing from server HTML: {e}")
+
+        # The server HTML shows the default variant; everything else comes from the JSON
+        variant["option2_value"] = variation_name
+        variant["tr_tags_html"] = _selected_variant_rows(soup, variant_id)
+        variant["variant_sku"] = variant_json.get("sku") or ""
+        variant["variant_barcode"] = variant_json.get("barcode") or ""
+        if variant["variant_price"] is None:
+            variant["variant_price"] = _money(variant_json.get("price"))
+            variant["variant_compare_price"] = _money(variant_json.get("compare_at_price"))
+        if variant_json is not default_variant:
+            variant["price_per_sq_ft_text"] = _money(variant_json.get("price"))
+            variant["original_price"] = _money(variant_json.get("compare_at_price"))
+        if multi_variant:
+            featured_image = variant_json.get("featured_image") or {}
+            variant["selected_image_url"] = _absolute_url(featured_image.get("src"))
+            if not variant["selected_image_url"] and resolve_image is not None:
+                variant["selected_image_url"] = resolve_image(radio)
+
+        records.append(variant_record(shared, variant, idx))
+    return records
+
+
+def scrape_product_fast(session, product_url, timeout=20, pacer=None, product_json=None):
+    """Build the variant records of a product from its JSON endpoint and server-rendered HTML.
+
+    Variants, SKUs, barcodes, prices and images come from the product JSON; the
+    spec table only exists in the HTML, which is fetched over the same session
+    and parsed with the snapshot parser. BrowserRequired is raised when either
+    source is unavailable so the caller can use the Selenium path instead, and
+    Throttled when the store rate-limits the session, as the browser would
+    be refused too. A product_json already fetched by the caller is reused.
+    """
+    pacer = pacer or Pacer("stealth")
+    try:
+        if product_json is None:
+            with pacer.request(product_url):
+                product_json = fetch_product_json(session, product_url, timeout=timeout)
+        with pacer.request(product_url):
+            response = session.get(product_url, timeout=timeout)
+        response.raise_for_status()
+    except requests.HTTPError as e:
+        throttled = throttled_response(e.response)
+        if throttled is not None:
+            raise throttled
+        raise BrowserRequired(f"storefront request failed: {e}")
+    except (requests.RequestException, ValueError) as e:
+        raise BrowserRequired(f"storefront request failed: {e}")
+
+    return records_from_product_json(BeautifulSoup(response.text, "lxml"), product_url, product_json)
+
+
+def scrape_product_dom(driver, product_url, pacer=None):
+    """Build every variation row from the loaded page without clicking any swatch.
+
+    The product JSON comes from the page itself, or from the storefront's .js
+    endpoint fetched inside the browser. A swatch is only clicked when its
+    variant image cannot be resolved from the JSON.
+    """
+    pacer = pacer or Pacer("stealth")
+    soup = BeautifulSoup(driver.page_source, "lxml")
+    product_json = _embedded_product_json(soup)
+    if product_json is None:
+        handle = product_url.split('/')[-1].split('?')[0]
+        try:
+            product_json = driver.execute_script(
+                "return fetch(arguments[0], {credentials: 'same-origin'}).then(r => r.json());",
+                f"{_store_url(product_url)}/products/{handle}.js",
+            )
+        except Exception as e:
+            raise BrowserRequired(f"product JSON unavailable: {e}")
+        if not isinstance(product_json, dict):
+            raise BrowserRequired("product JSON unavailable")
+
+    def resolve_image(radio):
+        try:
+            label = driver.find_element(By.CSS_SELECTOR, f"label[for='{radio.get('id')}']")
+            previous_url = driver.current_url
+            ActionChains(driver).move_to_element(label).perform()
+            WebDriverWait(driver, 10).until(EC.element_to_be_clickable(label)).click()
+            pacer.wait_until(driver, _url_changed(previous_url), timeout=5)
+            pacer.pause("variant_delay")
+            return driver.find_element(
+                By.CSS_SELECTOR, ".product-gallery__carousel-item.is-selected img"
+            ).get_attribute("src")
+        except Exception as e:
+            print(f"Error finding selected image: {e}")
+            return ""
+
+    return records_from_product_json(soup, product_url, product_json, resolve_image)
+
+
+def scrape_products(product_links, checkpoint, workers=1, max_restarts=3, extraction="webdriver", session=None,
+                    pacer=None, cache=None, browser_options=None, metrics=None, limiter=None, max_attempts=4,
+                    retry_delay=2.0, max_retry_delay=120.0, max_pending=None, started=None):
+    """Scrape product pages with a pool of workers, logging their records to the checkpoint.
+
+    product_links yields (seq, url) pairs and may still be producing them while
+    products are scraped; with max_pending, at most that many URLs are taken
+    from it before their products finish. Records are logged under their seq,
+    the lowest one when a URL comes up more than once, so the output order
+    does not depend on timing. Products already in the checkpoint are skipped.
+    Returns the number of products that could not be scraped; product_links
+    raising part way counts as one more, as its products were never queued.
+    The time to the first scraped product is measured from `started`, the
+    start of the run, when given.
+
+    Each worker owns one driver, started on first use. When a session is given,
+    products are fetched over HTTP first and only fall back to the browser when
+    scrape_product_fast raises BrowserRequired. With a cache, unchanged
+    products are re-emitted from it.
+
+    A product that fails is retried after an exponential backoff, up to
+    max_attempts times; a Retry-After from the site is honoured. A driver whose
+    page load times out or that dies is recycled; a worker stops after
+    max_restarts recycles without a scraped product in between. With a
+    limiter, every product starts only when the limiter allows it, and its
+    outcome and the time spent in its requests adapt the host's pace.
+    """
+    pacer = pacer or Pacer("stealth")
+    metrics = metrics or Metrics()
+    done = checkpoint.done_products()
+    if done:
+        print(f"Resuming: {len(done)} products already scraped.")
+    # (ready at, seq, url, attempt): retries wait in the same queue until their backoff has passed
+    tasks = queue.PriorityQueue()
+    queued = {}
+    saved = set()
+    pending = threading.BoundedSemaphore(max_pending) if max_pending else None
+
+    scraped = 0
+    failed = 0
+    retries = 0
+    remaining = 0
+    feeding = True
+    discovery_error = None
+    first_product = None
+    commands_total = 0
+    lock = threading.Lock()
+    start_time = time.time()
+
+    def feed():
+        nonlocal remaining, feeding, failed, discovery_error
+        try:
+            for seq, product_url in product_links:
+                with lock:
+                    if product_url in done:
+                        continue
+                    if product_url in queued:
+                        if seq < queued[product_url]:
+                            queued[product_url] = seq
+                            if product_url in saved:
+                                checkpoint.renumber_product(product_url, seq)
+                        continue
+                    queued[product_url] = seq
+                    remaining += 1
+                if pending is not None:
+                    pending.acquire()
+                tasks.put((0.0, seq, product_url, 0))
+        except Exception as e:
+            # Products on the pages that could not be read are missing, so the run is not complete
+            print(f"Error discovering product links: {e}")
+            with lock:
+                failed += 1
+                discovery_error = e
+        finally:
+            with lock:
+                feeding = False
+
+    def finish():
+        nonlocal remaining
+        with lock:
+            remaining -= 1
+        if pending is not None:
+            pending.release()
+
+    def retry_later(index, product_url, attempt, error, delay=None):
+        nonlocal failed, retries
+        if attempt + 1 >= max_attempts:
+            print(f"Error scraping product {product_url}: {error} (giving up after {attempt + 1} attempts)")
+            with lock:
+                failed += 1
+            finish()
+            return
+        if delay is None:
+            delay = min(max_retry_delay, retry_delay * 2 ** attempt) * random.uniform(0.5, 1.5)
+        print(f"Retrying {product_url} in {delay:.1f}s (attempt {attempt + 2}/{max_attempts}): {error}")
+        with lock:
+            retries += 1
+        tasks.put((time.time() + delay, index, product_url, attempt + 1))
+
+    def worker(worker_id):
+        nonlocal scraped, first_product, commands_total
+        driver = None
+        restarts = 0
+
+        def recycle_driver(reason):
+            nonlocal driver, restarts
+            restarts += 1
+            print(f"Worker {worker_id}: recycling the browser ({reason}), restart {restarts}/{max_restarts}")
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            driver = None
+
+        try:
+            while restarts <= max_restarts:
+                with lock:
+                    if not feeding and remaining == 0:
+                        break
+                try:
+                    ready_at, index, product_url, attempt = tasks.get(timeout=0.5)
+                except queue.Empty:
+                    # More links may still be produced, and other workers may re-queue failed products
+                    continue
+                if ready_at > time.time():
+                    tasks.put((ready_at, index, product_url, attempt))
+                    time.sleep(min(ready_at - time.time(), 0.5))
+                    continue
+
+                print(f"Worker {worker_id}: {product_url}")
+                if limiter is not None:
+                    limiter.acquire(product_url)
+                ok = False
+                throttled = False
+                try:
+                    records = None
+                    commands = 0
+                    fingerprint = None
+                    product_json = None
+                    if cache is not None:
+                        with metrics.phase("cache_check", product=product_url), pacer.request(product_url):
+                            records, fingerprint, product_json = cache.check(product_url)
+                        if records is not None:
+                            print(f"Unchanged since last run: {product_url}")
+                    if records is None and session is not None:
+                        try:
+                            with metrics.phase("http_fetch", product=product_url):
+                                records = scrape_product_fast(session, product_url, pacer=pacer,
+                                                              product_json=product_json)
+                        except BrowserRequired as e:
+                            print(f"Falling back to the browser for {product_url}: {e}")
+                    if records is None:
+                        if driver is None:
+                            driver = create_driver(**(browser_options or {}))
+                        commands_before = driver.command_count
+                        try:
+                            with metrics.phase("product", driver, product_url):
+                                records = scrape_product(driver, product_url, extraction=extraction, pacer=pacer,
+                                                      metrics=metrics)
+                        finally:
+                            commands = driver.command_count - commands_before
+                            metrics.collect_network(driver, product_url)
+                    if cache is not None:
+                        cache.store(product_url, fingerprint, records)
+                    with lock:
+                        index = queued[product_url]
+                        checkpoint.save_product(index, product_url, records)
+                        saved.add(product_url)
+                        scraped += 1
+                        count = scraped
+                        commands_total += commands
+                        if first_product is None:
+                            first_product = time.time() - (started or start_time)
+                            metrics.record("phase", "time_to_first_product", product_url, seconds=first_product)
+                    ok = True
+                    restarts = 0
+                    finish()
+                    name = records[-1].color if records else ""
+                    print(f"Scraped product {count}: {name} ({commands} WebDriver commands)")
+                except Throttled as e:
+                    throttled = True
+                    retry_later(index, product_url, attempt, e, delay=e.retry_after)
+                except BrowserStuck as e:
+                    # A page that never finishes loading leaves the browser stuck
+                    recycle_driver(str(e))
+                    retry_later(index, product_url, attempt, e)
+                except Exception as e:
+                    if driver is not None and not is_driver_alive(driver):
+                        recycle_driver(f"browser died: {e}")
+                    retry_later(index, product_url, attempt, e)
+                finally:
+                    if limiter is not None:
+                        # Only the requests count as latency, not pacing, clicks or parsing
+                        limiter.release(product_url, pacer.take_request_seconds(), ok=ok, throttled=throttled)
+            if restarts > max_restarts:
+                print(f"Worker {worker_id}: browser had to be recycled too often, stopping")
+        finally:
+            if driver is not None:
                 try:
-                    usage = driver.find_element(By.XPATH, "//tr[th[contains(text(), 'Usage:')]]").text.strip()
-                    usage = usage.split(':', 1)[1].strip()
-                except:
+                    driver.quit()
+                except Exception:
                     pass
 
-                tags = application + usage
-                tags = tags.replace(" | ", ", ")
-                # Surface type attribute
-                surface_attribute = ""
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    threads = []
+    for worker_id in range(1, max(1, workers) + 1):
+        thread = threading.Thread(target=worker, args=(worker_id,), daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    # Every worker gave up on its browser: whatever is still queued will not be scraped
+    with lock:
+        stranded = remaining
+        failed += stranded
+        cut_short = feeding
+    if stranded:
+        print(f"{stranded} queued products were not scraped because every worker stopped")
+    if cut_short:
+        print("Product links were still being discovered when every worker stopped")
+
+    elapsed = time.time() - start_time
+    per_minute = scraped / (elapsed / 60) if elapsed > 0 else 0.0
+    print(
+        f"Scraped {scraped}/{len(queued)} products in {elapsed:.1f}s "
+        f"with {len(threads)} workers ({per_minute:.1f} products/min)"
+    )
+    if first_product is not None:
+        print(f"First product scraped after {first_product:.1f}s")
+    if discovery_error is not None:
+        print(f"Product discovery stopped early, so some products were never queued: {discovery_error}")
+    if retries or failed:
+        print(f"Retried {retries} times; {failed} products failed")
+    if scraped:
+        print(f"Average WebDriver commands per product ({extraction} extraction): {commands_total / scraped:.1f}")
+    if limiter is not None:
+        print(limiter.summary())
+    return failed
+
+
+EXCEL_MAX_ROWS = 1048576
+
+
+def write_rows(rows, output_file, max_rows=EXCEL_MAX_ROWS):
+    """Stream rows into a Shopify import file and return how many were written.
+
+    A .csv file is written with csv.DictWriter, anything else as an .xlsx in
+    openpyxl's write-only mode, so rows are never all held in memory. When a
+    sheet reaches Excel's row limit the rest continues on a new sheet with
+    the same header; when that splits a handle, its product-only columns are
+    filled again on the new sheet's first row. The file is written next to
+    output_file and moved into place when complete.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    columns = list(first) if first is not None else []
+    if first is not None:
+        rows = itertools.chain([first], rows)
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    partial_file = output_file + ".partial"
+    written = 0
+
+    if output_file.endswith(".csv"):
+        with open(partial_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                written += 1
+    else:
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Products")
+        sheet.append(columns)
+        sheet_rows = 1
+        product_values = {}
+        for row in rows:
+            if sheet_rows >= max_rows:
+                sheet = workbook.create_sheet(f"Products {len(workbook.worksheets) + 1}")
+                sheet.append(columns)
+                sheet_rows = 1
+                # Rows blanked by product_values_once would leave the handle without them on this sheet
+                if row.get("Handle") == product_values.get("Handle"):
+                    row = {**row, **product_values}
+            if row.get("Handle") != product_values.get("Handle"):
+                product_values = {column: row.get(column) for column in ("Handle",) + PRODUCT_ONLY_COLUMNS
+                                  if column in row}
+            sheet.append([row[column] for column in columns])
+            sheet_rows += 1
+            written += 1
+        if len(workbook.worksheets) > 1:
+            print(f"{written} rows exceed Excel's row limit, split over {len(workbook.worksheets)} sheets")
+        workbook.save(partial_file)
+
+    os.replace(partial_file, output_file)
+    return written
+
+
+def link_or_copy(source, destination):
+    """Hard-link source to destination, copying it when linking is not possible."""
+    if os.path.abspath(source) == os.path.abspath(destination):
+        return
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+    if os.path.exists(destination):
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+# Query parameters the Shopify CDN uses for resizing and cache busting, not for picking the image
+IMAGE_URL_PARAMS = ("v", "width", "height", "crop", "format", "pad_color")
+
+
+def normalize_image_url(url):
+    """Return one canonical URL per image, without size and version parameters."""
+    url = _absolute_url(url)
+    if not url:
+        return ""
+    parts = urlsplit(url)
+    query = [(name, value) for name, value in parse_qsl(parts.query) if name not in IMAGE_URL_PARAMS]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def record_images(record):
+    """Return the (Image Src, Variant Image) URLs of a variant record's row."""
+    images = record.product.images
+    return (images[record.position] if record.position < len(images) else ""), record.image
+
+
+class ImageCache:
+    """Content-addressed on-disk store of downloaded images.
+
+    Each image body is stored once under its SHA-256, however many URLs point
+    at it, and an SQLite index maps normalized URLs to their file. evict()
+    removes the least recently used files until the store fits in max_bytes.
+    """
+
+    def __init__(self, directory=os.path.join("cache", "images"), max_bytes=2 * 1024 ** 3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.downloads = 0
+        self.evicted = 0
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite"), timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, sha256 TEXT)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files (sha256 TEXT PRIMARY KEY, path TEXT, size INTEGER, used_at REAL)"
+            )
+
+    def lookup(self, url):
+        """Return the local file of a cached image URL, or None."""
+        with self._lock, self._conn:
+            found = self._conn.execute(
+                "SELECT files.sha256, files.path FROM urls JOIN files ON files.sha256 = urls.sha256 WHERE urls.url = ?",
+                (url,),
+            ).fetchone()
+            if found is None or not os.path.exists(found[1]):
+                return None
+            self._conn.execute("UPDATE files SET used_at = ? WHERE sha256 = ?", (time.time(), found[0]))
+            self.hits += 1
+        return found[1]
+
+    def add(self, url, chunks, extension=""):
+        """Store an image body streamed in chunks under its content hash and return its file."""
+        os.makedirs(self.directory, exist_ok=True)
+        # Unique across threads and processes sharing the cache directory
+        fd, partial_file = tempfile.mkstemp(suffix=".partial", dir=self.directory)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+        except BaseException:
+            os.remove(partial_file)
+            raise
+        digest = digest.hexdigest()
+        path = os.path.join(self.directory, digest[:2], digest + extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(partial_file, path)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (digest, path, size, time.time()))
+            self._conn.execute("INSERT OR REPLACE INTO urls VALUES (?, ?)", (url, digest))
+            self.downloads += 1
+        return path
+
+    def evict(self, used_since=None):
+        """Remove least recently used files until the store fits in max_bytes.
+
+        Files used since used_since are kept, so a run never evicts its own images.
+        """
+        with self._lock, self._conn:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM files").fetchone()[0]
+            candidates = self._conn.execute(
+                "SELECT sha256, path, size FROM files WHERE used_at < ? ORDER BY used_at",
+                (used_since if used_since is not None else time.time(),),
+            ).fetchall()
+            for digest, path, size in candidates:
+                if total <= self.max_bytes:
+                    break
                 try:
-                    surface_type = driver.find_element(By.XPATH, "//tr[th[contains(text(), 'Surface Type:')]]").text.strip()
-                    surface_attribute = surface_type.split(':', 1)[1].strip()
-                except:
+                    os.remove(path)
+                except FileNotFoundError:
                     pass
+                self._conn.execute("DELETE FROM files WHERE sha256 = ?", (digest,))
+                self._conn.execute("DELETE FROM urls WHERE sha256 = ?", (digest,))
+                total -= size
+                self.evicted += 1
+        if total > self.max_bytes:
+            print(f"Image cache holds {total / 1024 ** 2:.1f} MB of this run's images, over its "
+                  f"{self.max_bytes / 1024 ** 2:.1f} MB limit")
+
+    def summary(self):
+        return f"Image cache: {self.hits} hits, {self.downloads} downloads, {self.evicted} evicted"
+
+    def close(self):
+        self._conn.close()
+
+
+def fetch_image(session, url, cache, timeout=30):
+    """Download one image into the cache and return its local file."""
+    with session.get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        extension = os.path.splitext(urlsplit(url).path)[1].lower()
+        if not extension:
+            content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+            extension = mimetypes.guess_extension(content_type) or ""
+        return cache.add(url, response.iter_content(65536), extension)
+
+
+def fetch_images(records, session, cache, workers=8, metrics=None):
+    """Download every distinct row image once and return {normalized URL: local file}.
+
+    Images already in the cache are not requested again. At most `workers`
+    downloads run at a time, sharing the session's connection pool.
+    """
+    metrics = metrics or Metrics()
+    urls = []
+    seen = set()
+    for record in records:
+        for url in record_images(record):
+            url = normalize_image_url(url)
+            if url and url not in seen:
+                seen.add(url)
+                urls.append(url)
+    tasks = queue.Queue()
+    for url in urls:
+        tasks.put(url)
+
+    local_files = {}
+    failed = 0
+    lock = threading.Lock()
+
+    def worker():
+        nonlocal failed
+        while True:
+            try:
+                url = tasks.get_nowait()
+            except queue.Empty:
+                break
+            path = cache.lookup(url)
+            if path is None:
+                try:
+                    with metrics.phase("image_download", detail=url):
+                        path = fetch_image(session, url, cache)
+                except (requests.RequestException, OSError) as e:
+                    print(f"Error downloading image {url}: {e}")
+                    with lock:
+                        failed += 1
+                    continue
+            with lock:
+                local_files[url] = path
+
+    threads = []
+    for _ in range(max(1, min(workers, len(urls)))):
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    print(f"Images: {len(urls)} distinct, {len(local_files)} stored locally, {failed} failed")
+    return local_files
+
+
+def write_image_manifest(records, local_files, manifest_file):
+    """Write which local file holds each image of each import row, in row order."""
+    os.makedirs(os.path.dirname(manifest_file) or ".", exist_ok=True)
+    with open(manifest_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Row", "Handle", "Variant ID", "Image Src", "Image Src File", "Variant Image",
+                         "Variant Image File"])
+        for number, record in enumerate(records, start=1):
+            image_src, variant_image = record_images(record)
+            writer.writerow([
+                number, record.product.handle, record.variant_id,
+                image_src, local_files.get(normalize_image_url(image_src), ""),
+                variant_image, local_files.get(normalize_image_url(variant_image), ""),
+            ])
+
+
+def collect_links(brands, start_page, end_page, session=None, page_size=24, pacer=None, checkpoint=None,
+                  metrics=None, browser_options=None):
+    """Collect the unique product URLs of every brand, one brand after another.
+
+    Listing pages are only rendered when no session is given or products.json
+    is unavailable.
+    """
+    driver = None
+    product_links = []
+    try:
+        for brand_url in brands:
+            links = None
+            if session is not None:
+                try:
+                    links = discover_product_links(session, brand_url, start_page, end_page, page_size=page_size,
+                                                   pacer=pacer, checkpoint=checkpoint, metrics=metrics)
+                except BrowserRequired as e:
+                    print(f"Falling back to rendered listing pages: {e}")
+            if links is None:
+                if driver is None:
+                    driver = create_driver(**(browser_options or {}))
+                links = collect_product_links(driver, brand_url, start_page, end_page, pacer=pacer,
+                                              checkpoint=checkpoint, metrics=metrics)
+            product_links.extend(links)
+    finally:
+        if driver is not None:
+            driver.quit()
+
+    unique = unique_links(product_links)
+    if len(unique) < len(product_links):
+        print(f"Removed {len(product_links) - len(unique)} duplicate product links.")
+    return unique
+
+
+# Room for each listing page's products in the seq of a pipelined product
+LISTING_SLOTS = 10000
+
+
+def produce_links(brands, start_page, end_page, session=None, page_size=24, pacer=None, checkpoint=None,
+                  metrics=None, browser_options=None, queue_size=100):
+    """Discover the products of every brand at once, yielding (seq, url) pairs as pages are read.
+
+    One producer thread per brand walks its listing pages, through
+    products.json when a session is given and rendered pages otherwise, and
+    puts each URL on a queue of queue_size, so producers wait while the
+    product workers are behind. seq orders URLs by brand, page and position
+    on the page, as a sequential run would. A producer that fails passes its
+    error on, and it is raised once every other brand has been walked, as
+    collect_links would raise it.
+    """
+    links_queue = queue.Queue(maxsize=queue_size)
+    pages = end_page - start_page + 1
+
+    def produce(brand_index, brand_url):
+        def put(page, links):
+            for position, link in enumerate(links):
+                links_queue.put((((brand_index * pages) + page - start_page) * LISTING_SLOTS + position, link))
+
+        driver = None
+        try:
+            if session is not None:
+                try:
+                    for page, links in products_json_pages(session, brand_url, start_page, end_page, page_size,
+                                                           pacer, checkpoint, metrics=metrics):
+                        put(page, links)
+                    return
+                except BrowserRequired as e:
+                    print(f"Falling back to rendered listing pages: {e}")
+            driver = create_driver(**(browser_options or {}))
+            for page, links in listing_pages(driver, brand_url, start_page, end_page, pacer, checkpoint, metrics):
+                put(page, links)
+        except Exception as e:
+            print(f"Error discovering products on {brand_url}: {e}")
+            links_queue.put(e)
+        finally:
+            if driver is not None:
+                driver.quit()
+            links_queue.put(None)
+
+    for brand_index, brand_url in enumerate(brands):
+        threading.Thread(target=produce, args=(brand_index, brand_url), daemon=True).start()
+    running = len(brands)
+    errors = []
+    while running:
+        item = links_queue.get()
+        if item is None:
+            running -= 1
+        elif isinstance(item, Exception):
+            errors.append(item)
+        else:
+            yield item
+    if errors:
+        raise errors[0]
+
+
+def scrape_data(brands, start_page, end_page, workers=1, extraction="webdriver", fast_path=False,
+                pacing="stealth", domain_intervals=None, incremental=False, cache_max_age_days=7, fast_discovery=False,
+                listing_page_size=24, lean_browser=False, blocked_resources=("image", "media", "font", "tracker"),
+                unblocked_patterns=(), page_load_strategy="normal", adaptive=False, max_attempts=4, output_dir="output",
+                output_format="xlsx", product_values_once=False, images=False, image_workers=8,
+                image_cache_size=2 * 1024 ** 3, pipelined=False, queue_size=100, copies=(".",)):
+    started = time.time()
+    pacer = Pacer(pacing, domain_intervals)
+    metrics = Metrics(output_dir)
+    limiter = AdaptiveRateLimiter(max_concurrency=workers) if adaptive else None
+    browser_options = {
+        "lean": lean_browser,
+        "blocked_resources": blocked_resources,
+        "unblocked_patterns": unblocked_patterns,
+        "page_load_strategy": page_load_strategy,
+    }
+    checkpoint = Checkpoint.for_run(brands, start_page, end_page, os.path.join(output_dir, "checkpoints"), pipelined)
+    print(f"Logging progress to {checkpoint.path}")
+    session = None
+    if fast_path or incremental or fast_discovery:
+        session = create_session(pool_size=workers + (len(brands) if pipelined else 0))
+    cache = ProductCache(session, max_age_days=cache_max_age_days) if incremental else None
+
+    if pipelined:
+        # Scrape products while every brand's listing pages are still being walked
+        product_links = produce_links(brands, start_page, end_page, session if fast_discovery else None,
+                                      page_size=listing_page_size, pacer=pacer, checkpoint=checkpoint,
+                                      metrics=metrics, browser_options=browser_options, queue_size=queue_size)
+    else:
+        product_links = enumerate(collect_links(brands, start_page, end_page, session if fast_discovery else None,
+                                                listing_page_size, pacer, checkpoint, metrics, browser_options))
+    failed = scrape_products(product_links, checkpoint, workers=workers, extraction=extraction,
+                             session=session if fast_path else None, pacer=pacer, cache=cache,
+                             browser_options=browser_options, metrics=metrics, limiter=limiter,
+                             max_attempts=max_attempts, max_pending=queue_size if pipelined else None,
+                             started=started)
+    if cache is not None:
+        cache.evict_stale()
+        print(cache.summary())
+        cache.close()
+
+    # Stream the log into the import file once, then link it into the other locations
+    output_file = os.path.join(output_dir, f"scraped_data.{output_format}")
+    try:
+        written = write_rows(expand_rows(checkpoint.iter_records(), product_values_once), output_file)
+        if failed:
+            print(f"{failed} products failed; the next run with these settings resumes to retry them")
+        else:
+            checkpoint.mark_complete()
+        if images:
+            image_cache = ImageCache(max_bytes=image_cache_size)
+            images_started = time.time()
+            local_files = fetch_images(checkpoint.iter_records(), create_session(pool_size=image_workers), image_cache,
+                                       workers=image_workers, metrics=metrics)
+            write_image_manifest(checkpoint.iter_records(), local_files, os.path.join(output_dir, "images.csv"))
+            image_cache.evict(used_since=images_started)
+            print(image_cache.summary())
+            image_cache.close()
+    finally:
+        checkpoint.close()
+    for directory in copies:
+        link_or_copy(output_file, os.path.join(directory, os.path.basename(output_file)))
+
+    print(f"Scraped data ({written} rows) saved to {output_file}")
+    print(pacer.summary())
+    metrics.write(output_dir)
+
+
+SHARD_DIR = os.path.join("output", "shards")
+MANIFEST_FILE = os.path.join(SHARD_DIR, "manifest.json")
+
+
+def configured_scrape(brands, start_page, end_page, **kwargs):
+    """Run scrape_data with the settings configured at the bottom of this file."""
+    return scrape_data(brands, start_page, end_page, workers=workers, extraction=extraction, fast_path=fast_path,
+                       pacing=pacing, domain_intervals=domain_intervals, incremental=incremental,
+                       cache_max_age_days=cache_max_age_days,
+                       fast_discovery=fast_discovery, listing_page_size=listing_page_size, lean_browser=lean_browser,
+                       blocked_resources=blocked_resources, unblocked_patterns=unblocked_patterns,
+                       page_load_strategy=page_load_strategy, adaptive=adaptive, max_attempts=max_attempts,
+                       output_format=output_format, product_values_once=product_values_once, images=images,
+                       image_workers=image_workers, image_cache_size=image_cache_size, pipelined=pipelined,
+                       queue_size=queue_size, **kwargs)
+
+
+def shard_manifest(brands, start_page, end_page, pages_per_shard=20, manifest_file=MANIFEST_FILE):
+    """Split every brand's page range into shards and write them to a manifest."""
+    shards = []
+    for brand_url in brands:
+        for first_page in range(start_page, end_page + 1, pages_per_shard):
+            shards.append({
+                "id": len(shards),
+                "brand": brand_url,
+                "start_page": first_page,
+                "end_page": min(first_page + pages_per_shard - 1, end_page),
+            })
+    manifest = {"brands": list(brands), "start_page": start_page, "end_page": end_page, "shards": shards}
+    os.makedirs(os.path.dirname(manifest_file) or ".", exist_ok=True)
+    with open(manifest_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(manifest_file=MANIFEST_FILE):
+    with open(manifest_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def shard_output_dir(shard_id):
+    return os.path.join(SHARD_DIR, f"shard-{shard_id}")
+
+
+def run_shard(shard_id, manifest_file=MANIFEST_FILE):
+    """Scrape one shard of the manifest into its own output directory."""
+    shard = load_manifest(manifest_file)["shards"][shard_id]
+    print(f"Running shard {shard_id}: {shard['brand']} pages {shard['start_page']}-{shard['end_page']}")
+    configured_scrape([shard["brand"]], shard["start_page"], shard["end_page"],
+                      output_dir=shard_output_dir(shard_id), copies=())
+
+
+def iter_shard_records(shard):
+    """Yield the logged variant records of one shard of the manifest.
+
+    The checkpoint is the one run_shard's settings map to, so checkpoints
+    left in the shard directory by runs with other settings are ignored.
+    """
+    path = Checkpoint.run_path([shard["brand"]], shard["start_page"], shard["end_page"],
+                               os.path.join(shard_output_dir(shard["id"]), "checkpoints"), pipelined)
+    if not os.path.exists(path):
+        print(f"Shard {shard['id']} has no output, skipping it.")
+        return
+    checkpoint = Checkpoint(path)
+    try:
+        yield from checkpoint.iter_records()
+    finally:
+        checkpoint.close()
 
-                # Loop through variations
-                image_positions = list(range(1, len(filtered_images) + 1))
-
-                length_of_variations = len(variations)
-                for idx, variation in enumerate(variations):
-                    label = driver.find_element(By.CSS_SELECTOR, f"label[for='{variation.get_attribute('id')}']")
-
-                    # Scroll to the label and click it
-                    ActionChains(driver).move_to_element(label).perform()
-                    WebDriverWait(driver, 10).until(EC.element_to_be_clickable(label)).click()
-                    time.sleep(2)  # Allow page to update
-
-                    # Extract variation-specific details
-                    current_url = driver.current_url
-                    variant_id = current_url.split("variant=")[-1]
-
-                    variation_name = variation.get_attribute("value")
-                    option2_value = driver.find_element(By.CSS_SELECTOR, "span.product-form__selected-value").text.strip()
-                    variant_sku = driver.find_element(By.CSS_SELECTOR, "span.product-meta__sku-number").text.strip()
-
-                    # Find all price elements
-                    price_elements = driver.find_elements(By.CSS_SELECTOR, "span.box-price-pcsPerCarton")
-
-                    # Extract correct price based on variant_id
-                    if length_of_variations>1:
-                        for price_element in price_elements:
-                            if price_element.get_attribute("data-id") == variant_id:
-                                variant_price = price_element.get_attribute("data-price")
-                                variant_compare_price = price_element.get_attribute("data-compare-price")
-                                break  
-                    else:
-                        variant_price = driver.find_element(By.CSS_SELECTOR, "span.box-price-pcsPerCarton").get_attribute("data-price")
-                        variant_compare_price = driver.find_element(By.CSS_SELECTOR, "span.box-price-pcsPerCarton").get_attribute("data-compare-price")
-
-
-                    price_per_sq_ft_text = ""
-                    try:
-                        price_per_sq_ft_element = driver.find_element(By.CSS_SELECTOR, "span.price.price--highlight")
-                        price_per_sq_ft_text = price_per_sq_ft_element.text.strip().replace("Sale price", "").strip()
-                    except Exception as e:
-                        print(f"Price Per Sq Ft Error: {e}")
-
-                
-                    original_price = ""
-                    try:
-                        original_price_text = driver.find_element(By.CSS_SELECTOR, "span.price.price--compare").text.strip()
-                        original_price = original_price_text.replace("Regular price", "").strip()
-                    except:
-                        pass
-
-                   
-                    if length_of_variations > 1:
-                        variant_barcode = ""
-                        try:
-                            variant_barcode = driver.find_element(By.CSS_SELECTOR, "tr.table-row-spec.barcode-container.d-none").get_attribute("data-value")
-                        except:
-                            pass
-                    else:
-                        variant_barcode = ""
-                        try:
-                            barcode_element = driver.find_element(By.CSS_SELECTOR, "tr.table-row-spec.barcode-container")
-                            variant_barcode = barcode_element.get_attribute("data-value")
-                        except:
-                            pass
-
-                    weight = ""
-                    try:
-                        weight_container = driver.find_element(By.XPATH, "//tr[th[contains(text(), 'Weight:')]]")
-                        weight = weight_container.find_element(By.CSS_SELECTOR, "td.spec-values").text.strip()
-                    except:
-                        pass
-
-                    uom = row_html = driver.find_element(By.XPATH, f"//tr[th[contains(text(), 'UOM:')]]").get_attribute("outerHTML")
-                    # get the text from uom
-                    uom = uom.split('<td class="spec-values">')[1].split('</td>')[0]
-                    
-
-
-                    # Find all <tr> tags with the matching data-id
-                    rows = driver.find_elements(By.CSS_SELECTOR, f"tr[data-id='{variant_id}']")
-                    tr_tags_html = [row.get_attribute("outerHTML") for row in rows]
-
-                    # Initialize the relevant table HTML
-                    relevant_table_html = "<table>"
-
-                    # Add the <tr> tags matching the data-id to relevant_table_html
-                    for tr_tag in tr_tags_html:
-                        relevant_table_html += tr_tag
-
-                    # Collect additional fields by matching specific table headers
-                    if length_of_variations>1:
-                        fields_to_append = [
-                                        "Weight", "Width","UOM","Length", "Thickness", "Collection", "Composition",
-                                        "Design", "Ends", "Edges", "Surface Type", "Installation Type",
-                                        "Usage", "Application"
-                                    ]
-                        
-                    else:
-                        fields_to_append = [
-                                        "PCs per box","Coverage Area","Color Shade","Weight", "Width","UOM","Length", "Thickness", "Collection", "Composition",
-                                        "Design", "Ends", "Edges", "Surface Type", "Installation Type",
-                                        "Usage", "Application"
-                                    ]
-
-                    for field in fields_to_append:
-                        try:
-                            # Locate the <tr> row with the specific field header and add its outerHTML
-                            row_html = driver.find_element(By.XPATH, f"//tr[th[contains(text(), '{field}:')]]").get_attribute("outerHTML")
-                            relevant_table_html += row_html
-                        except Exception as e:
-                            # Skip if the field is not found
-                            print(f"Field '{field}' not found. Skipping. Error: {e}")
-
-                    # Close the table HTML
-                    relevant_table_html += "</table>"
-
-
-                    
-                    seo_description_element = driver.find_element(By.CSS_SELECTOR, "div.rte.text--pull > p")
-                    variant_description = seo_description_element.text.strip()
-
-
-                    soup = BeautifulSoup(relevant_table_html, "html.parser")
-
-                    # Extract Coverage Area from <tr> where <th> contains 'Coverage Area'
-                    coverage_area = ""
-                    try:
-                        coverage_area_element = soup.find("tr", class_="coverage-area-container")
-                        if coverage_area_element:
-                            coverage_area = coverage_area_element["data-value"].strip()
-                    except:
-                        pass
-
-                    # Extract PCs per Box from <tr> where <th> contains 'PCs per Box'
-                    pcs_per_box = ""
-                    try:
-                        pcs_per_box_element = soup.find("tr", class_="pcsPerBox-container")
-                        if pcs_per_box_element:
-                            pcs_per_box = pcs_per_box_element["data-value"].strip()
-                    except:
-                        pass
-                    selected_image_url = ""
-                    
-                    if length_of_variations > 1:
-                        try:
-                            selected_image_element = driver.find_element(By.CSS_SELECTOR, ".product-gallery__carousel-item.is-selected img")
-                            selected_image_url = selected_image_element.get_attribute("src")
-                        except Exception as e:
-                            print(f"Error finding selected image: {e}")
-                    
-                    else:
-                        if len(all_image_src) > 1:  # Ensure there is a second element before accessing index 1
-                            selected_image_url = all_image_src[1]
-                        elif len(all_image_src) > 0:  # Fallback to first image if only one exists
-                            selected_image_url = all_image_src[0]
-
-                    # Append data
-                    scraped_data.append({
-                        "Handle": handle,
-                        "Title": title,
-                        "Variation":variation_name,
-                        "Body (HTML)": relevant_table_html,
-                        "Vendor": vendor,
-                        "Type": breadcrumb_type,
-                        "Tags": tags,
-                                                    "Option1 Name": "Color",
-                        "Option1 Value": option2_value,
-                                                    "Option2 Name": "Size",
-
-                        "Option2 Value": option1_value,
-                        "Variant SKU": variant_sku,
-                                                    "Variant Grams": " ",
-                                        "Variant Inventory Tracker": "shopify",
-            "Variant Inventory Qty": "50000",
-                                        "Variant Inventory Policy": "deny",
-                                        "Variant Fulfillment Service": "manual",
-                        "Variant Price": variant_price,
-                        "Variant Compare At Price": variant_compare_price,
-                                        "Variant Requires Shipping": "TRUE",
-                                            "Variant Taxable": "TRUE",
-                                        "Variant Barcode": variant_barcode,
-                                                                    "Variant Weight Unit":" ",
-                                        "Gift Card": "FALSE",
-
-                        "Weight": weight,
-                        "SEO Title": title,
-                        "Product description box = Product Details Field (product.metafields.custom.product_details_field)": product_description_box,
-                        "Google Shopping / Condition": " ",
-                                        "Status": "active",
-                                                                    "Variant Description": variant_description,
-
-                        "Coverage Area (product.metafields.custom.coverage_area)": coverage_area,
-                        "pcsperbox (product.metafields.custom.pcsperbox)": pcs_per_box,
-                        "Price Per Sq Ft (product.metafields.custom.price_per_sq_ft)": price_per_sq_ft_text,
-                        "Image Src": filtered_images[idx] if idx < len(filtered_images) else "",
-                        "Variant Image": selected_image_url,
-                        "Image Position": image_positions[idx] if idx < len(image_positions) else None,
-                        "Original Price": original_price,
-                        "Surface Type (product.metafields.custom.surface_type)": surface_attribute,
-                        "uom (product.metafields.custom.uom)": uom,
-                    })
-                print(f"Scraped product {count}: {option2_value}")
-                count += 1
-
-            except Exception as e:
-                print(f"Error scraping product {product_url}: {e}")
-
-    
-    df = pd.DataFrame(scraped_data)
-    df.to_excel("scraped_data.xlsx", index=False, engine='openpyxl')
-
-    output_dir = "output"
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Save the Excel file
-    output_file = os.path.join(output_dir, "scraped_data.xlsx")
-    df.to_excel(output_file, index=False, engine='openpyxl')
-    
-    print(f"Scraped data saved to {output_file}")
-
-    driver.quit()
+
+def merge_shards(manifest_file=MANIFEST_FILE, output_file=os.path.join("output", "scraped_data.xlsx"),
+                 product_values_once=False):
+    """Concatenate shard outputs in manifest order into one Shopify import file.
+
+    Shards are read one after another in manifest order. Variants are
+    de-duplicated by handle and variant id, and every handle's rows are kept
+    together in order of first appearance, as the Shopify importer expects.
+    """
+    shards = load_manifest(manifest_file)["shards"]
+
+    products = {}
+    seen = set()
+    duplicates = 0
+    for shard in shards:
+        for record in iter_shard_records(shard):
+            key = (record.product.handle, record.variant_id)
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            products.setdefault(record.product.handle, []).append(record)
+
+    merged = (record for records in products.values() for record in records)
+    written = write_rows(expand_rows(merged, product_values_once), output_file)
+    print(f"Merged {written} rows from {len(shards)} shards ({duplicates} duplicates removed) into {output_file}")
+
+
+def run_shards_locally(manifest_file=MANIFEST_FILE, processes=4):
+    """Run every shard of the manifest in local worker processes, then merge them."""
+    shard_ids = [shard["id"] for shard in load_manifest(manifest_file)["shards"]]
+    with multiprocessing.Pool(max(1, min(processes, len(shard_ids)))) as pool:
+        pool.starmap(run_shard, [(shard_id, manifest_file) for shard_id in shard_ids])
+    merge_shards(manifest_file, product_values_once=product_values_once)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape Shopify collections into a Shopify import file.")
+    commands = parser.add_subparsers(dest="command")
+
+    shard = commands.add_parser("shard", help="split brands x page range into a shard manifest")
+    shard.add_argument("--pages-per-shard", type=int, default=20)
+    shard.add_argument("--manifest", default=MANIFEST_FILE)
+
+    work = commands.add_parser("work", help="scrape one shard of the manifest")
+    work.add_argument("--shard", type=int, required=True)
+    work.add_argument("--manifest", default=MANIFEST_FILE)
+
+    local = commands.add_parser("run-shards", help="run every shard in local processes and merge them")
+    local.add_argument("--processes", type=int, default=4)
+    local.add_argument("--manifest", default=MANIFEST_FILE)
+
+    merge = commands.add_parser("merge", help="merge shard outputs into one import file")
+    merge.add_argument("--manifest", default=MANIFEST_FILE)
+    merge.add_argument("--output", default=os.path.join("output", "scraped_data.xlsx"))
+
+    return parser.parse_args(argv)
 
 
 # enter the brand urls here
@@ -435,4 +2616,77 @@ brands = ["https://floorscenter.com/collections/ottimo-tiles"]
 start_page = 21
 end_page = 100
 
-scrape_data(brands, start_page, end_page)
+# number of browsers scraping product pages in parallel
+workers = 4
+
+# "webdriver" reads every field with its own WebDriver call,
+# "snapshot" parses one page_source per variant state,
+# "dom" reads all variants from the first page load without clicking
+extraction = "dom"
+
+# fetch Shopify product JSON over HTTP and only open a browser when that fails
+fast_path = True
+
+# humanization profile: "stealth", "balanced" or "fast"
+pacing = "balanced"
+
+# minimum seconds between requests to a host, overriding the profile
+domain_intervals = {"floorscenter.com": 1.5}
+
+# re-emit cached rows for products that did not change since the last run
+incremental = True
+# cached rows older than this are scraped again, as the spec table is not covered by the fingerprint
+cache_max_age_days = 7
+
+# discover product links through the collection's products.json instead of rendering listing pages
+fast_discovery = True
+
+# products per listing page on the storefront, so products.json pages line up with start_page/end_page
+listing_page_size = 24
+
+# block heavy resources in the browser; a blocked pattern that mentions any string in
+# unblocked_patterns is dropped (e.g. "klaviyo.com" unblocks "*static.klaviyo.com*")
+lean_browser = True
+blocked_resources = ["image", "media", "font", "tracker"]
+unblocked_patterns = []
+
+# "eager" returns from driver.get once the DOM is ready instead of after every image and script
+page_load_strategy = "eager"
+
+# speed up or back off per host based on latency, errors and challenge pages
+adaptive = True
+
+# attempts per product before it is given up, with exponential backoff in between
+max_attempts = 4
+
+# "xlsx" or "csv"; both use Shopify's product import columns
+output_format = "xlsx"
+
+# leave product-level columns such as Title and Vendor blank after each product's first row;
+# shrinks the import file, but other tools reading it will see those cells empty
+product_values_once = False
+
+# download every row image once into a content-addressed cache and map rows to the files in output/images.csv
+images = False
+image_workers = 8
+image_cache_size = 2 * 1024 ** 3
+
+# scrape products while listing pages are still being walked, all brands at once;
+# queue_size bounds the product links waiting to be scraped
+pipelined = True
+queue_size = 100
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == "shard":
+        manifest = shard_manifest(brands, start_page, end_page, args.pages_per_shard, args.manifest)
+        # The shard ids on stdout feed the CI job matrix
+        print(json.dumps([shard["id"] for shard in manifest["shards"]]))
+    elif args.command == "work":
+        run_shard(args.shard, args.manifest)
+    elif args.command == "run-shards":
+        run_shards_locally(args.manifest, args.processes)
+    elif args.command == "merge":
+        merge_shards(args.manifest, args.output, product_values_once)
+    else:
+        configured_scrape(brands, start_page, end_page)